@@ -1,14 +1,23 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
-import random
-import string
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-import re
+from storage import open_storage, DB_FILE
+from guest_import import EMAIL_PATTERN, import_guests
+from passwords import hash_password, verify_password, needs_rehash
+from tokens import InvitationTokenStore, generate_password, invitation_link
+from lazy_tree import LazyTreeview, ListSource, PagedSource
+from tk_tasks import TaskRunner, ProgressDialog
+from guest_model import GuestListModel
+from email_service import EmailService
+
+# Guests handled per step when sending invitations, between progress updates
+INVITATION_BATCH = 100
+# Guests listed by name in the invitation summary
+SUMMARY_GUESTS = 20
 
 class EventPlannerApp:
     def __init__(self, root):
@@ -17,9 +26,23 @@ class EventPlannerApp:
         self.root.geometry("800x600")
         self.root.configure(bg='#f0f8ff')
         
-        # Data storage files
+        # Legacy JSON data files, imported into the database on first start
         self.users_file = "users.json"
         self.events_file = "events.json"
+        self.storage = open_storage(DB_FILE)
+        self.invitation_tokens = InvitationTokenStore(DB_FILE)
+        
+        # Storage and email calls run here, off the Tk main loop
+        self.tasks = TaskRunner(root)
+        
+        # Outgoing mail; without SMTP_SERVER invitations are only prepared
+        smtp_server = os.environ.get('SMTP_SERVER')
+        self.email_service = None
+        if smtp_server:
+            self.email_service = EmailService(smtp_server,
+                                              int(os.environ.get('SMTP_PORT', 587)),
+                                              os.environ.get('SMTP_EMAIL', ''),
+                                              os.environ.get('SMTP_PASSWORD', ''))
         
         # Current user session
         self.current_user = None
@@ -35,29 +58,15 @@ class EventPlannerApp:
         self.show_login_screen()
     
     def initialize_data_files(self):
-        """Initialize JSON files for data storage"""
-        for file in [self.users_file, self.events_file]:
-            if not os.path.exists(file):
-                with open(file, 'w') as f:
-                    json.dump([], f)
-    
-    def load_data(self, filename):
-        """Load data from JSON file"""
+        """Import legacy JSON data into the database if it is still empty"""
         try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-    
-    def save_data(self, filename, data):
-        """Save data to JSON file"""
-        try:
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=4)
-            return True
+            self.storage.import_json(self.users_file, self.events_file)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save data: {str(e)}")
-            return False
+            messagebox.showerror("Error", f"Failed to import data: {str(e)}")
+    
+    def task_failed(self, action):
+        """Return an on_error callback reporting that action failed"""
+        return lambda e: messagebox.showerror("Error", f"{action}: {str(e)}")
     
     def clear_frame(self):
         """Clear all widgets from main frame"""
@@ -101,8 +110,7 @@ class EventPlannerApp:
     
     def validate_email(self, email):
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return EMAIL_PATTERN.match(email) is not None
     
     def register(self):
         """Handle user registration"""
@@ -122,27 +130,25 @@ class EventPlannerApp:
             messagebox.showerror("Error", "Please enter a valid email address")
             return
         
-        # Load existing users
-        users = self.load_data(self.users_file)
-        
-        # Check if username already exists
-        if any(user['username'] == username for user in users):
-            messagebox.showerror("Error", "Username already exists")
-            return
-        
-        # Create new user
-        new_user = {
-            'username': username,
-            'password': password,  # In real app, hash the password
-            'email': email
-        }
-        
-        users.append(new_user)
-        
-        if self.save_data(self.users_file, users):
-            messagebox.showinfo("Success", "Registration successful! Please login.")
-            self.username_entry.delete(0, tk.END)
-            self.password_entry.delete(0, tk.END)
+        def create_user(task):
+            # Check if username already exists
+            if self.storage.get_user(username):
+                return "Username already exists"
+            # Create new user
+            if not self.storage.create_user(username, hash_password(password), email):
+                return "Email is already registered"
+            return None
+        
+        def registered(error):
+            if error:
+                messagebox.showerror("Error", error)
+            else:
+                messagebox.showinfo("Success", "Registration successful! Please login.")
+                self.username_entry.delete(0, tk.END)
+                self.password_entry.delete(0, tk.END)
+        
+        self.tasks.submit(create_user, on_done=registered,
+                          on_error=self.task_failed("Registration failed"))
     
     def login(self):
         """Handle user login"""
@@ -153,22 +159,28 @@ class EventPlannerApp:
             messagebox.showerror("Error", "Please fill in all fields")
             return
         
-        users = self.load_data(self.users_file)
+        def check_password(task):
+            user = self.storage.get_user(username)
+            if user and verify_password(user['password'], password):
+                if needs_rehash(user['password']):
+                    self.storage.update_password(username, hash_password(password))
+                return user
+            return None
         
-        for user in users:
-            if user['username'] == username and user['password'] == password:
+        def logged_in(user):
+            if user:
                 self.current_user = user
                 self.show_dashboard()
-                return
+            else:
+                messagebox.showerror("Error", "Invalid username or password")
         
-        messagebox.showerror("Error", "Invalid username or password")
+        self.tasks.submit(check_password, on_done=logged_in,
+                          on_error=self.task_failed("Login failed"))
     
     def generate_password(self, length=12):
         """Generate a strong random password"""
         try:
-            characters = string.ascii_letters + string.digits + "!@#$%^&*()"
-            password = ''.join(random.choice(characters) for _ in range(length))
-            return password
+            return generate_password(length)
         except Exception as e:
             messagebox.showerror("Error", f"Password generation failed: {str(e)}")
             return "Fallback123!"
@@ -203,10 +215,9 @@ class EventPlannerApp:
     
     def show_recent_events(self):
         """Display recent events on dashboard"""
-        events = self.load_data(self.events_file)
-        user_events = [e for e in events if e['creator'] == self.current_user['username']]
+        recent_events = self.storage.dashboard_stats(self.current_user['username'])['recent_events']
         
-        if user_events:
+        if recent_events:
             events_frame = ttk.LabelFrame(self.main_frame, text="Recent Events", padding="10")
             events_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
             
@@ -220,12 +231,12 @@ class EventPlannerApp:
                 tree.column(col, width=150)
             
             # Add events
-            for event in user_events[-5:]:  # Show last 5 events
+            for event in recent_events:
                 tree.insert('', tk.END, values=(
                     event['name'],
                     event['date'],
                     event['location'],
-                    len(event['guests'])
+                    event['guest_count']
                 ))
             
             tree.pack(fill=tk.BOTH, expand=True)
@@ -286,7 +297,6 @@ class EventPlannerApp:
                 
                 # Create event object
                 new_event = {
-                    'id': len(self.load_data(self.events_file)) + 1,
                     'name': name,
                     'date': date,
                     'location': location,
@@ -296,18 +306,21 @@ class EventPlannerApp:
                     'guests': [],
                     'created_at': datetime.now().isoformat()
                 }
-                
-                # Save event
-                events = self.load_data(self.events_file)
-                events.append(new_event)
-                
-                if self.save_data(self.events_file, events):
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to create event: {str(e)}")
+                return
+            
+            def saved(event):
+                if event:
                     messagebox.showinfo("Success", 
                                       f"Event created successfully!\nEvent Password: {event_password}")
                     self.show_dashboard()
+                else:
+                    messagebox.showerror("Error", "Failed to create event")
             
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to create event: {str(e)}")
+            # Save event
+            self.tasks.submit(lambda task: self.storage.create_event(new_event), on_done=saved,
+                              on_error=self.task_failed("Failed to create event"))
         
         # Save button
         ttk.Button(form_frame, text="Create Event", 
@@ -321,10 +334,8 @@ class EventPlannerApp:
         ttk.Button(self.main_frame, text="← Back to Dashboard", 
                   command=self.show_dashboard).pack(anchor=tk.W, pady=10)
         
-        events = self.load_data(self.events_file)
-        user_events = [e for e in events if e['creator'] == self.current_user['username']]
-        
-        if not user_events:
+        creator = self.current_user['username']
+        if not self.storage.count_events(creator):
             ttk.Label(self.main_frame, text="No events found").pack(pady=50)
             return
         
@@ -332,35 +343,23 @@ class EventPlannerApp:
         events_frame = ttk.LabelFrame(self.main_frame, text="My Events", padding="10")
         events_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        # Create treeview with scrollbar
-        tree_frame = ttk.Frame(events_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        columns = ('ID', 'Event Name', 'Date', 'Location', 'Guests', 'Password')
-        tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
-        
-        # Define headings
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Add events
-        for event in user_events:
-            tree.insert('', tk.END, values=(
+        # Events are read a page at a time as the list scrolls, on a worker thread
+        source = PagedSource(
+            lambda cursor, limit: self.storage.page_events(creator, sort='created_at',
+                                                           cursor=cursor, limit=limit,
+                                                           include_guests=False),
+            lambda event: (event['id'], (
                 event['id'],
                 event['name'],
                 event['date'],
                 event['location'],
-                len(event['guests']),
+                event['guest_count'],
                 event['password']
-            ))
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            )))
+        columns = ('ID', 'Event Name', 'Date', 'Location', 'Guests', 'Password')
+        event_list = LazyTreeview(events_frame, columns, source, height=15, runner=self.tasks)
+        event_list.pack(fill=tk.BOTH, expand=True)
+        tree = event_list.tree
         
         # Action buttons
         action_frame = ttk.Frame(events_frame)
@@ -392,13 +391,25 @@ class EventPlannerApp:
         
         event_id = tree.item(selection[0])['values'][0]
         
-        if messagebox.askyesno("Confirm", "Are you sure you want to delete this event?"):
-            events = self.load_data(self.events_file)
-            events = [e for e in events if e['id'] != event_id]
-            
-            if self.save_data(self.events_file, events):
+        if not messagebox.askyesno("Confirm", "Are you sure you want to delete this event?"):
+            return
+        
+        def delete(task):
+            deleted = self.storage.delete_event(event_id)
+            if deleted:
+                self.invitation_tokens.revoke(event_id)
+            return deleted
+        
+        def deleted(ok):
+            if ok:
                 messagebox.showinfo("Success", "Event deleted successfully")
-                self.show_my_events()
+                # Only the deleted row goes; the rest of the list stays as loaded
+                if tree.exists(selection[0]):
+                    tree.delete(selection[0])
+            else:
+                messagebox.showerror("Error", "Failed to delete event")
+        
+        self.tasks.submit(delete, on_done=deleted, on_error=self.task_failed("Failed to delete event"))
     
     def view_guests(self, tree):
         """View guests for selected event"""
@@ -420,8 +431,7 @@ class EventPlannerApp:
         ttk.Label(self.main_frame, text="Select an event to manage guests", 
                  font=('Arial', 12)).pack(pady=10)
         
-        events = self.load_data(self.events_file)
-        user_events = [e for e in events if e['creator'] == self.current_user['username']]
+        user_events = self.storage.list_events(self.current_user['username'])
         
         if not user_events:
             ttk.Label(self.main_frame, text="No events found").pack(pady=50)
@@ -437,8 +447,7 @@ class EventPlannerApp:
     
     def manage_event_guests(self, event_id):
         """Manage guests for a specific event"""
-        events = self.load_data(self.events_file)
-        event = next((e for e in events if e['id'] == event_id), None)
+        event = self.storage.get_event(event_id)
         
         if not event:
             messagebox.showerror("Error", "Event not found")
@@ -458,6 +467,19 @@ class EventPlannerApp:
         ttk.Label(info_frame, text=f"Date: {event['date']}").pack(anchor=tk.W)
         ttk.Label(info_frame, text=f"Event Password: {event['password']}").pack(anchor=tk.W)
         
+        # Widgets below follow the model rather than rebuilding the screen
+        model = GuestListModel(event)
+        counts_label = ttk.Label(info_frame)
+        counts_label.pack(anchor=tk.W)
+        
+        def show_counts(*args):
+            counts = model.status_counts
+            counts_label.configure(text=f"Guests: {len(model)} (Accepted {counts['Accepted']}, "
+                                        f"Declined {counts['Declined']}, Pending {counts['Pending']})")
+        
+        show_counts()
+        model.subscribe(show_counts)
+        
         # Guest management
         guest_frame = ttk.LabelFrame(self.main_frame, text="Guest Management", padding="10")
         guest_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -487,81 +509,109 @@ class EventPlannerApp:
                 messagebox.showerror("Error", "Please enter a valid email address")
                 return
             
-            # Check if guest already exists
-            if any(g['email'] == email for g in event['guests']):
-                messagebox.showerror("Error", "Guest with this email already exists")
-                return
-            
-            # Add guest
-            event['guests'].append({
-                'name': name,
-                'email': email,
-                'invited_at': datetime.now().isoformat()
-            })
+            def added(guest):
+                if not guest:
+                    messagebox.showerror("Error", "Guest with this email already exists")
+                else:
+                    messagebox.showinfo("Success", "Guest added successfully")
+                    guest_email.delete(0, tk.END)
+                    guest_name.delete(0, tk.END)
+                    model.add(guest)
             
-            # Update events data
-            events = self.load_data(self.events_file)
-            for e in events:
-                if e['id'] == event_id:
-                    e['guests'] = event['guests']
-                    break
-            
-            if self.save_data(self.events_file, events):
-                messagebox.showinfo("Success", "Guest added successfully")
-                guest_email.delete(0, tk.END)
-                guest_name.delete(0, tk.END)
-                self.manage_event_guests(event_id)  # Refresh
+            # Add guest, rejecting duplicate emails
+            self.tasks.submit(lambda task: self.storage.add_guest(event_id, name, email),
+                              on_done=added, on_error=self.task_failed("Failed to add guest"))
         
         ttk.Button(add_frame, text="Add Guest", command=add_guest).pack(side=tk.LEFT, padx=10)
         ttk.Button(add_frame, text="Send Invitations", 
-                  command=lambda: self.send_invitations(event)).pack(side=tk.LEFT, padx=10)
+                  command=lambda: self.send_invitations(dict(event, guests=[g.to_dict() for g in model]))).pack(side=tk.LEFT, padx=10)
+        ttk.Button(add_frame, text="Import CSV", 
+                  command=lambda: self.import_guests_csv(event_id)).pack(side=tk.LEFT, padx=10)
         
         # Guests list
-        if event['guests']:
-            list_frame = ttk.Frame(guest_frame)
-            list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-            
-            columns = ('Name', 'Email', 'Invited At')
-            tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
-            
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=200)
+        list_frame = ttk.Frame(guest_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        def guest_row(guest):
+            return guest.email, (
+                guest.name,
+                guest.email,
+                guest.invited_at[:10],  # Just the date part
+                guest.status
+            )
+        
+        # Only the visible rows are inserted; the rest follow on scroll
+        source = ListSource([guest_row(guest) for guest in model])
+        columns = ('Name', 'Email', 'Invited At', 'Status')
+        guest_list = LazyTreeview(list_frame, columns, source, height=10, column_width=150)
+        guest_list.pack(fill=tk.BOTH, expand=True)
+        tree = guest_list.tree
+        
+        empty_label = ttk.Label(list_frame, text="No guests added yet")
+        
+        def update_list(change, guest):
+            """Insert or delete just the changed row"""
+            if change == 'added':
+                guest_list.add_row(*guest_row(guest))
+            else:
+                guest_list.remove_row(guest.email)
+            if len(model):
+                empty_label.pack_forget()
+            else:
+                empty_label.pack(pady=20)
+        
+        model.subscribe(update_list)
+        if not len(model):
+            empty_label.pack(pady=20)
+        
+        # Remove guest button
+        def remove_guest():
+            selection = tree.selection()
+            if not selection:
+                messagebox.showwarning("Warning", "Please select a guest to remove")
+                return
             
-            for guest in event['guests']:
-                tree.insert('', tk.END, values=(
-                    guest['name'],
-                    guest['email'],
-                    guest['invited_at'][:10]  # Just the date part
-                ))
+            guest_email = selection[0]
             
-            tree.pack(fill=tk.BOTH, expand=True)
+            def remove(task):
+                removed = self.storage.remove_guest(event_id, guest_email)
+                if removed:
+                    self.invitation_tokens.revoke(event_id, guest_email)
+                return removed
             
-            # Remove guest button
-            def remove_guest():
-                selection = tree.selection()
-                if not selection:
-                    messagebox.showwarning("Warning", "Please select a guest to remove")
-                    return
-                
-                guest_email = tree.item(selection[0])['values'][1]
-                event['guests'] = [g for g in event['guests'] if g['email'] != guest_email]
-                
-                # Update events data
-                events = self.load_data(self.events_file)
-                for e in events:
-                    if e['id'] == event_id:
-                        e['guests'] = event['guests']
-                        break
-                
-                if self.save_data(self.events_file, events):
+            def removed(ok):
+                if ok:
                     messagebox.showinfo("Success", "Guest removed successfully")
-                    self.manage_event_guests(event_id)
+                    model.remove(guest_email)
             
-            ttk.Button(guest_frame, text="Remove Selected Guest", 
-                      command=remove_guest).pack(pady=10)
-        else:
-            ttk.Label(guest_frame, text="No guests added yet").pack(pady=20)
+            self.tasks.submit(remove, on_done=removed,
+                              on_error=self.task_failed("Failed to remove guest"))
+        
+        ttk.Button(guest_frame, text="Remove Selected Guest", 
+                  command=remove_guest).pack(pady=10)
+    
+    def import_guests_csv(self, event_id):
+        """Add guests from a name,email CSV file in one write"""
+        filename = filedialog.askopenfilename(
+            title="Import Guests",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not filename:
+            return
+        
+        def read_file(task):
+            with open(filename, 'r', encoding='utf-8', newline='') as f:
+                return import_guests(self.storage, event_id, f)
+        
+        def imported(summary):
+            message = (f"Imported {summary['added']} guests\n"
+                       f"Duplicates skipped: {summary['duplicates']}\n"
+                       f"Invalid rows skipped: {summary['invalid']}")
+            if summary['errors']:
+                message += "\n\n" + "\n".join(summary['errors'])
+            messagebox.showinfo("Import Guests", message)
+            self.manage_event_guests(event_id)
+        
+        self.tasks.submit(read_file, on_done=imported, on_error=self.task_failed("Import failed"))
     
     def send_invitations(self, event):
         """Send email invitations to all guests"""
@@ -569,25 +619,57 @@ class EventPlannerApp:
             messagebox.showwarning("Warning", "No guests to send invitations to")
             return
         
-        # In a real application, you would implement actual email sending
-        # This is a simulation
-        
-        invitation_links = []
-        for guest in event['guests']:
-            # Generate unique invitation link (simulated)
-            invitation_link = f"http://yourapp.com/events/{event['id']}/join?token={self.generate_password(16)}"
-            invitation_links.append((guest['name'], guest['email'], invitation_link))
-        
-        # Show invitation summary
-        summary = f"Invitations ready to send for: {event['name']}\n\n"
-        summary += f"Event Password: {event['password']}\n\n"
-        summary += "Guests:\n"
-        for name, email, link in invitation_links:
-            summary += f"- {name} ({email})\n"
-            summary += f"  Link: {link}\n\n"
-        
-        messagebox.showinfo("Invitation Summary", 
-                          f"{summary}\n\nIn a real application, these would be sent via email.")
+        guests = event['guests']
+        progress = ProgressDialog(self.root, "Send Invitations",
+                                  f"Preparing invitations for {event['name']}")
+        
+        def send(task):
+            """Issue tokens and send a batch at a time until done or cancelled"""
+            invitation_links = []
+            failed = 0
+            for start in range(0, len(guests), INVITATION_BATCH):
+                if task.cancelled():
+                    break
+                batch = [dict(g) for g in guests[start:start + INVITATION_BATCH]]
+                # One persisted token per guest, issued as a batch
+                tokens = self.invitation_tokens.issue(event['id'], [g['email'] for g in batch])
+                for guest in batch:
+                    guest['link'] = invitation_link(event['id'], tokens[guest['email']])
+                    invitation_links.append((guest['name'], guest['email'], guest['link']))
+                if self.email_service is not None:
+                    results = self.email_service.send_invitations(event, batch)
+                    failed += sum(1 for result in results if not result['sent'])
+                task.report(len(invitation_links), len(guests))
+            return invitation_links, failed, task.cancelled()
+        
+        def sent(outcome):
+            invitation_links, failed, cancelled = outcome
+            progress.close()
+            
+            # Show invitation summary
+            summary = f"Invitations ready to send for: {event['name']}\n\n"
+            if cancelled:
+                summary += f"Cancelled after {len(invitation_links)} of {len(guests)} guests\n\n"
+            summary += f"Event Password: {event['password']}\n\n"
+            summary += "Guests:\n"
+            for name, email, link in invitation_links[:SUMMARY_GUESTS]:
+                summary += f"- {name} ({email})\n"
+                summary += f"  Link: {link}\n\n"
+            if len(invitation_links) > SUMMARY_GUESTS:
+                summary += f"... and {len(invitation_links) - SUMMARY_GUESTS} more\n"
+            
+            if self.email_service is None:
+                summary += "\n\nIn a real application, these would be sent via email."
+            elif failed:
+                summary += f"\n\n{failed} invitations could not be delivered."
+            messagebox.showinfo("Invitation Summary", summary)
+        
+        def send_failed(e):
+            progress.close()
+            messagebox.showerror("Error", f"Sending invitations failed: {str(e)}")
+        
+        progress.task = self.tasks.submit(send, on_done=sent, on_error=send_failed,
+                                          on_progress=progress.update)
     
     def logout(self):
         """Logout current user"""
@@ -599,6 +681,7 @@ def main():
         root = tk.Tk()
         app = EventPlannerApp(root)
         root.mainloop()
+        app.tasks.shutdown()
     except Exception as e:
         messagebox.showerror("Application Error", f"The application encountered an error:\n{str(e)}")
 
@@ -1,64 +1,135 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-import json
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, g, abort
 import os
-import random
-import string
-import re
+import time
 from datetime import datetime
 from functools import wraps
+from storage import open_storage, DB_FILE
+from email_service import EmailService, AsyncEmailService
+from job_queue import InvitationQueue
+from guest_import import validate_email, import_guests
+from session_store import open_session_store
+from passwords import hash_password, verify_password, needs_rehash
+from tokens import InvitationTokenStore, generate_password, invitation_link
+from metrics import (METRICS_ENABLED, RequestProfiler, instrument, instrument_templates,
+                     observe_request, render_metrics, span)
 
 import os
 print("Current working directory:", os.getcwd())
 print("Templates directory exists:", os.path.exists('Templates'))
 if os.path.exists('Templates'):
     print("Files in Templates directory:", os.listdir('Templates'))
-app = Flask(__name__)
+app = Flask(__name__, template_folder='Templates')
 app.secret_key = 'your-secret-key-here'  # Change this in production
 
-# Data storage files
+# Legacy JSON data files, imported into the database on first start
 USERS_FILE = "users.json"
 EVENTS_FILE = "events.json"
 
+# With EVENT_PLANNER_METRICS=1 every call on these is timed for /metrics
+storage = instrument(open_storage(DB_FILE), 'storage')
+
+# The session cookie only carries an opaque id; user data lives server-side
+session_store = instrument(open_session_store(DB_FILE), 'sessions')
+
+invitation_tokens = instrument(InvitationTokenStore(DB_FILE), 'tokens')
+
+profiler = RequestProfiler()
+if METRICS_ENABLED:
+    instrument_templates(app)
+
+# Outgoing mail; without SMTP_SERVER invitations are prepared but not emailed.
+# Setting SMTP_RATE (messages/second) switches to the rate-limited async sender,
+# which opens SMTP_SESSIONS connections with at most SMTP_PER_DOMAIN messages
+# in flight per recipient domain.
+SMTP_SERVER = os.environ.get('SMTP_SERVER')
+SMTP_RATE = os.environ.get('SMTP_RATE')
+SMTP_SESSIONS = int(os.environ.get('SMTP_SESSIONS', 4))
+SMTP_PER_DOMAIN = int(os.environ.get('SMTP_PER_DOMAIN', 2))
+email_service = None
+if SMTP_SERVER:
+    smtp_settings = (SMTP_SERVER,
+                     int(os.environ.get('SMTP_PORT', 587)),
+                     os.environ.get('SMTP_EMAIL', ''),
+                     os.environ.get('SMTP_PASSWORD', ''))
+    if SMTP_RATE:
+        email_service = AsyncEmailService(*smtp_settings, rate=float(SMTP_RATE),
+                                          sessions=SMTP_SESSIONS, per_domain=SMTP_PER_DOMAIN)
+    else:
+        email_service = EmailService(*smtp_settings)
+
+INVITATION_WORKERS = int(os.environ.get('INVITATION_WORKERS', 2))
+
+# Answers accepted by the join page, and the guest status each one records
+RSVP_RESPONSES = {'accept': 'Accepted', 'decline': 'Declined'}
+
 def initialize_data_files():
-    """Initialize JSON files for data storage"""
-    for file in [USERS_FILE, EVENTS_FILE]:
-        if not os.path.exists(file):
-            with open(file, 'w') as f:
-                json.dump([], f)
-
-def load_data(filename):
-    """Load data from JSON file"""
-    try:
-        with open(filename, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    """Import legacy JSON data into the database if it is still empty"""
+    storage.import_json(USERS_FILE, EVENTS_FILE)
 
-def save_data(filename, data):
-    """Save data to JSON file"""
-    try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
-        return True
-    except Exception as e:
-        return False
-
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def generate_password(length=12):
-    """Generate a strong random password"""
-    characters = string.ascii_letters + string.digits + "!@#$%^&*()"
-    password = ''.join(random.choice(characters) for _ in range(length))
-    return password
+# Runs on import so WSGI servers (gunicorn app:app) see the existing data too
+initialize_data_files()
+
+def deliver_invitations(event_id, guests):
+    """Create invitation links for a batch of guests and email them"""
+    event = storage.get_event(event_id, include_guests=False)
+    if event is None:
+        raise ValueError(f"Event {event_id} no longer exists")
+    
+    tokens = invitation_tokens.issue(event_id, [g['email'] for g in guests])
+    for guest in guests:
+        guest['link'] = invitation_link(event_id, tokens[guest['email']])
+    
+    if email_service is None:
+        # Links exist but nothing was emailed; the job reports them as prepared
+        return [{'email': g['email'], 'sent': False, 'error': None, 'link': g['link']}
+                for g in guests]
+    
+    with span('email.send_invitations'):
+        results = email_service.send_invitations(event, guests)
+    for result, guest in zip(results, guests):
+        result['link'] = guest['link']
+    return results
+
+invitation_queue = InvitationQueue(deliver_invitations, DB_FILE)
+invitation_queue.start(INVITATION_WORKERS)
+
+@app.before_request
+def start_request():
+    """Start the request timer and, if asked for, the profiler"""
+    if METRICS_ENABLED:
+        g.request_started = time.perf_counter()
+    if profiler.mode:
+        g.profiler = profiler.start(request.headers)
+
+@app.after_request
+def finish_request(response):
+    """Record the request's duration and save its profile"""
+    if METRICS_ENABLED and 'request_started' in g:
+        observe_request(request.method, request.endpoint, response.status_code,
+                        time.perf_counter() - g.request_started)
+    if g.get('profiler') is not None:
+        response.headers['X-Profile-File'] = profiler.finish(g.pop('profiler'), request.endpoint)
+    return response
+
+@app.teardown_request
+def release_profiler(exc):
+    """Stop a profiler left running when a request failed before after_request"""
+    if g.get('profiler') is not None:
+        profiler.finish(g.pop('profiler'), request.endpoint)
+
+@app.before_request
+def load_session_user():
+    """Look up the logged-in user for this request from the session store"""
+    sid = session.get('sid')
+    g.user = session_store.get(sid) if sid else None
+    if sid and g.user is None:
+        session.pop('sid', None)
 
 def login_required(f):
     """Decorator to require login for routes"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user' not in session:
+        if g.user is None:
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('login'))
         return f(*args, **kwargs)
@@ -66,7 +137,7 @@ def login_required(f):
 
 @app.route('/')
 def index():
-    if 'user' in session:
+    if g.user:
         return redirect(url_for('dashboard'))
     return redirect(url_for('login'))
 
@@ -80,13 +151,17 @@ def login():
             flash('Please fill in all fields', 'error')
             return render_template('login')
         
-        users = load_data(USERS_FILE)
+        user = storage.get_user(username)
         
-        for user in users:
-            if user['username'] == username and user['password'] == password:
-                session['user'] = user
-                flash('Login successful!', 'success')
-                return redirect(url_for('dashboard'))
+        if user and verify_password(user['password'], password):
+            if needs_rehash(user['password']):
+                storage.update_password(username, hash_password(password))
+            session.clear()
+            session['sid'] = session_store.create({'id': user.get('id'),
+                                                   'username': user['username'],
+                                                   'email': user['email']})
+            flash('Login successful!', 'success')
+            return redirect(url_for('dashboard'))
         
         flash('Invalid username or password', 'error')
     
@@ -107,21 +182,11 @@ def register():
             flash('Please enter a valid email address', 'error')
             return render_template('register')
         
-        users = load_data(USERS_FILE)
-        
-        if any(user['username'] == username for user in users):
+        if storage.get_user(username):
             flash('Username already exists', 'error')
             return render_template('register')
         
-        new_user = {
-            'username': username,
-            'password': password,
-            'email': email
-        }
-        
-        users.append(new_user)
-        
-        if save_data(USERS_FILE, users):
+        if storage.create_user(username, hash_password(password), email):
             flash('Registration successful! Please login.', 'success')
             return redirect(url_for('login'))
         else:
@@ -132,23 +197,63 @@ def register():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    events = load_data(EVENTS_FILE)
-    user_events = [e for e in events if e['creator'] == session['user']['username']]
-    
-    # Get recent events (last 5)
-    recent_events = user_events[-5:] if user_events else []
+    stats = storage.dashboard_stats(g.user['username'])
     
     return render_template('dashboard.html', 
-                         user=session['user'],
-                         events=recent_events,
-                         total_events=len(user_events))
+                         user=g.user,
+                         events=stats['recent_events'],
+                         total_events=stats['total_events'],
+                         upcoming_events=stats['upcoming_events'],
+                         total_guests=stats['total_guests'])
+
+EVENTS_PAGE_SIZE = 20
+MAX_EVENTS_PAGE_SIZE = 100
+
+def event_page_args():
+    """Read listing options from the query string"""
+    args = request.args
+    try:
+        limit = min(max(int(args.get('limit', EVENTS_PAGE_SIZE)), 1), MAX_EVENTS_PAGE_SIZE)
+    except ValueError:
+        limit = EVENTS_PAGE_SIZE
+    return {
+        'sort': args.get('sort', 'date'),
+        'descending': args.get('order') == 'desc',
+        'date_from': args.get('date_from', '').strip() or None,
+        'date_to': args.get('date_to', '').strip() or None,
+        'location': args.get('location', '').strip() or None,
+        'cursor': args.get('cursor') or None,
+        'limit': limit,
+    }
 
 @app.route('/events')
 @login_required
 def events():
-    events_list = load_data(EVENTS_FILE)
-    user_events = [e for e in events_list if e['creator'] == session['user']['username']]
-    return render_template('events.html', events=user_events)
+    options = event_page_args()
+    try:
+        user_events, next_cursor = storage.page_events(g.user['username'], include_guests=False,
+                                                       **options)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('events'))
+    
+    # Query string for the next page keeps the current sort and filters
+    filters = {k: v for k, v in request.args.items() if k != 'cursor'}
+    return render_template('events.html', events=user_events,
+                           next_cursor=next_cursor, filters=filters)
+
+@app.route('/api/events')
+@login_required
+def api_events():
+    try:
+        user_events, next_cursor = storage.page_events(g.user['username'], include_guests=False,
+                                                       **event_page_args())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    for event in user_events:
+        del event['guests']
+    return jsonify({'events': user_events, 'next_cursor': next_cursor})
 
 @app.route('/events/create', methods=['GET', 'POST'])
 @login_required
@@ -171,22 +276,18 @@ def create_event():
         
         event_password = generate_password()
         
-        events = load_data(EVENTS_FILE)
         new_event = {
-            'id': len(events) + 1,
             'name': name,
             'date': date,
             'location': location,
             'description': description,
-            'creator': session['user']['username'],
+            'creator': g.user['username'],
             'password': event_password,
             'guests': [],
             'created_at': datetime.now().isoformat()
         }
         
-        events.append(new_event)
-        
-        if save_data(EVENTS_FILE, events):
+        if storage.create_event(new_event):
             flash(f'Event created successfully! Event Password: {event_password}', 'success')
             return redirect(url_for('events'))
         else:
@@ -197,10 +298,9 @@ def create_event():
 @app.route('/events/<int:event_id>/guests', methods=['GET', 'POST'])
 @login_required
 def manage_guests(event_id):
-    events_list = load_data(EVENTS_FILE)
-    event = next((e for e in events_list if e['id'] == event_id), None)
+    event = storage.get_event(event_id)
     
-    if not event or event['creator'] != session['user']['username']:
+    if not event or event['creator'] != g.user['username']:
         flash('Event not found or access denied', 'error')
         return redirect(url_for('events'))
     
@@ -213,50 +313,60 @@ def manage_guests(event_id):
                 flash('Please fill in all guest fields', 'error')
             elif not validate_email(email):
                 flash('Please enter a valid email address', 'error')
-            elif any(g['email'] == email for g in event['guests']):
-                flash('Guest with this email already exists', 'error')
             else:
-                event['guests'].append({
-                    'name': name,
-                    'email': email,
-                    'invited_at': datetime.now().isoformat()
-                })
-                
-                # Update events data
-                for e in events_list:
-                    if e['id'] == event_id:
-                        e['guests'] = event['guests']
-                        break
-                
-                if save_data(EVENTS_FILE, events_list):
+                guest = storage.add_guest(event_id, name, email)
+                if guest:
+                    event['guests'].append(guest)
                     flash('Guest added successfully', 'success')
                 else:
-                    flash('Failed to add guest', 'error')
+                    flash('Guest with this email already exists', 'error')
         
         elif 'remove_guest' in request.form:
             guest_email = request.form['guest_email']
-            event['guests'] = [g for g in event['guests'] if g['email'] != guest_email]
             
-            # Update events data
-            for e in events_list:
-                if e['id'] == event_id:
-                    e['guests'] = event['guests']
-                    break
-            
-            if save_data(EVENTS_FILE, events_list):
+            if storage.remove_guest(event_id, guest_email):
+                invitation_tokens.revoke(event_id, guest_email)
+                event['guests'] = [g for g in event['guests'] if g['email'] != guest_email]
                 flash('Guest removed successfully', 'success')
             else:
                 flash('Failed to remove guest', 'error')
     
     return render_template('manage_guests.html', event=event)
 
+@app.route('/events/<int:event_id>/guests/import', methods=['POST'])
+@login_required
+def import_guests_csv(event_id):
+    event = storage.get_event(event_id, include_guests=False)
+    
+    if not event or event['creator'] != g.user['username']:
+        flash('Event not found or access denied', 'error')
+        return redirect(url_for('events'))
+    
+    csv_file = request.files.get('csv_file')
+    if not csv_file or not csv_file.filename:
+        flash('Please choose a CSV file to import', 'error')
+        return redirect(url_for('manage_guests', event_id=event_id))
+    
+    try:
+        summary = import_guests(storage, event_id, csv_file.stream)
+    except (ValueError, UnicodeDecodeError) as e:
+        flash(f'Import failed: {str(e)}', 'error')
+        return redirect(url_for('manage_guests', event_id=event_id))
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(summary)
+    
+    flash(f"Imported {summary['added']} guests "
+          f"({summary['duplicates']} duplicates, {summary['invalid']} invalid rows skipped)",
+          'success' if summary['added'] else 'warning')
+    return redirect(url_for('manage_guests', event_id=event_id))
+
 @app.route('/events/<int:event_id>/send_invitations')
 @login_required
 def send_invitations(event_id):
-    events_list = load_data(EVENTS_FILE)
-    event = next((e for e in events_list if e['id'] == event_id), None)
+    event = storage.get_event(event_id)
     
-    if not event or event['creator'] != session['user']['username']:
+    if not event or event['creator'] != g.user['username']:
         flash('Event not found or access denied', 'error')
         return redirect(url_for('events'))
     
@@ -264,41 +374,113 @@ def send_invitations(event_id):
         flash('No guests to send invitations to', 'warning')
         return redirect(url_for('manage_guests', event_id=event_id))
     
-    # Simulate sending invitations
-    invitation_summary = []
-    for guest in event['guests']:
-        invitation_link = f"http://yourapp.com/events/{event_id}/join?token={generate_password(16)}"
-        invitation_summary.append({
-            'name': guest['name'],
-            'email': guest['email'],
-            'link': invitation_link
-        })
-    
-    flash('Invitations prepared successfully! In a real application, these would be sent via email.', 'success')
-    return render_template('invitation_summary.html', 
-                         event=event, 
-                         invitations=invitation_summary)
+    # Delivery happens on the background workers; only queue the job here
+    job_id = invitation_queue.enqueue(event_id, event['guests'])
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id,
+                        'status_url': url_for('invitation_status', job_id=job_id)}), 202
+    
+    flash(f'Invitations queued for {len(event["guests"])} guests (job {job_id}).', 'success')
+    return redirect(url_for('manage_guests', event_id=event_id))
+
+@app.route('/invitations/<int:job_id>')
+@login_required
+def invitation_status(job_id):
+    job = invitation_queue.status(job_id)
+    event = storage.get_event(job['event_id'], include_guests=False) if job else None
+    
+    if not event or event['creator'] != g.user['username']:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job)
+
+@app.route('/events/<int:event_id>/join', methods=['GET', 'POST'])
+def join_event(event_id):
+    """RSVP page for invited guests, authorised by the token in their link"""
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    token = request.args.get('token', '')
+    invitation = invitation_tokens.lookup(token) if token else None
+    
+    if invitation is None or invitation['event_id'] != event_id:
+        if wants_json:
+            return jsonify({'error': 'Invalid or expired invitation'}), 404
+        return render_template('join.html', event=None, guest=None, token=token), 404
+    
+    if request.method == 'POST':
+        response = request.form.get('response') or (request.get_json(silent=True) or {}).get('response')
+        status = RSVP_RESPONSES.get(response)
+        if status is None:
+            return jsonify({'error': "response must be 'accept' or 'decline'"}), 400
+        
+        # Only the guest's own row changes; repeating an answer is a no-op
+        previous = storage.set_guest_status(event_id, invitation['email'], status)
+        if previous is None:
+            return jsonify({'error': 'Invalid or expired invitation'}), 404
+        
+        if wants_json:
+            return jsonify({'event_id': event_id, 'email': invitation['email'],
+                            'status': status, 'changed': previous != status})
+        flash('Thank you, your response has been recorded', 'success')
+        return redirect(url_for('join_event', event_id=event_id, token=token))
+    
+    event = storage.get_event(event_id, include_guests=False)
+    guest = storage.get_guest(event_id, invitation['email'])
+    if event is None or guest is None:
+        if wants_json:
+            return jsonify({'error': 'Invalid or expired invitation'}), 404
+        return render_template('join.html', event=None, guest=None, token=token), 404
+    
+    if wants_json:
+        return jsonify({'event_id': event_id, 'name': event['name'], 'date': event['date'],
+                        'location': event['location'], 'email': guest['email'],
+                        'status': guest['status']})
+    return render_template('join.html', event=event, guest=guest, token=token)
+
+@app.route('/events/<int:event_id>/rsvps')
+@login_required
+def event_rsvps(event_id):
+    event = storage.get_event(event_id, include_guests=False)
+    
+    if not event or event['creator'] != g.user['username']:
+        return jsonify({'error': 'Event not found'}), 404
+    
+    return jsonify(storage.rsvp_counts(event_id))
 
 @app.route('/events/<int:event_id>/delete')
 @login_required
 def delete_event(event_id):
-    events_list = load_data(EVENTS_FILE)
-    events_list = [e for e in events_list if e['id'] != event_id]
+    event = storage.get_event(event_id)
     
-    if save_data(EVENTS_FILE, events_list):
+    if not event or event['creator'] != g.user['username']:
+        flash('Event not found or access denied', 'error')
+    elif storage.delete_event(event_id):
+        invitation_tokens.revoke(event_id)
         flash('Event deleted successfully', 'success')
     else:
         flash('Failed to delete event', 'error')
     
     return redirect(url_for('events'))
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; only served with EVENT_PLANNER_METRICS=1"""
+    if not METRICS_ENABLED:
+        abort(404)
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/storage/stats')
+@login_required
+def storage_stats():
+    return jsonify(storage.cache_stats())
+
 @app.route('/logout')
 def logout():
-    session.pop('user', None)
+    sid = session.pop('sid', None)
+    if sid:
+        session_store.delete(sid)
     flash('You have been logged out successfully', 'success')
     return redirect(url_for('login'))
 
 if __name__ == '__main__':
-    initialize_data_files()
-   
     app.run(host='0.0.0.0', port=0, debug=True)
\ No newline at end of file
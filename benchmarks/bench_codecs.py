@@ -0,0 +1,65 @@
+"""Benchmark: load/save throughput of events.json in each data format
+
+Writes a synthetic events file with every available codec (the legacy
+indent=4 layout included) and times a full save (atomic write with fsync)
+and a full load (format detection plus decode), as the JSON backend does.
+
+    python benchmarks/bench_codecs.py [events] [guests per event]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data_codecs import CODECS, load_file
+from file_lock import atomic_write
+
+
+def synthetic_events(count, guests):
+    return [{
+        'id': i,
+        'name': f'Event {i}',
+        'date': f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'location': f'Venue {i % 50}',
+        'description': 'Synthetic benchmark event',
+        'creator': f'user{i % 100}',
+        'password': 'x7!Kq2#pLm9@',
+        'created_at': '2026-01-01T12:00:00.000000',
+        'guests': [{'name': f'Guest {j}', 'email': f'guest{j}@e{i}.example.com',
+                    'invited_at': '2026-01-02T09:30:00.000000', 'status': 'Pending'}
+                   for j in range(guests)],
+    } for i in range(1, count + 1)]
+
+
+def best_of(fn, runs=3):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples), statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    guests = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    data = synthetic_events(count, guests)
+    print(f"{count} events, {guests} guests each; codecs: {', '.join(CODECS)}")
+    print(f"{'codec':<12} {'size MB':>8} {'save ms':>9} {'load ms':>9} {'save MB/s':>10} {'load MB/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, codec in CODECS.items():
+            path = os.path.join(tmp, f'events.{name}')
+            save, _ = best_of(lambda: atomic_write(path, lambda f: f.write(codec.dumps(data)),
+                                                   mode='wb'))
+            size = os.path.getsize(path) / 1e6
+            load, _ = best_of(lambda: load_file(path))
+            assert load_file(path) == data
+            print(f"{name:<12} {size:>8.1f} {save * 1000:>9.1f} {load * 1000:>9.1f} "
+                  f"{size / save:>10.1f} {size / load:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
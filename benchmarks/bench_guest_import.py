@@ -0,0 +1,55 @@
+"""Benchmark: streaming CSV guest import into each storage backend
+
+    python benchmarks/bench_guest_import.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from guest_import import import_guests
+from json_storage import JSONStorage
+from storage import SQLiteStorage
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        f.write('name,email\n')
+        for i in range(rows):
+            # Every 50th row is a duplicate and every 100th is invalid
+            if i % 100 == 99:
+                f.write(f'Guest {i},not-an-email\n')
+            elif i % 50 == 49:
+                f.write(f'Guest {i},guest{i - 1}@example.com\n')
+            else:
+                f.write(f'Guest {i},guest{i}@example.com\n')
+
+
+def run(label, storage, csv_path, rows):
+    storage.create_user('bench', 'secret', 'bench@example.com')
+    event = storage.create_event({'name': 'Bench', 'date': '2026-01-01', 'location': 'Here',
+                                  'description': '', 'creator': 'bench',
+                                  'password': 'pw', 'guests': []})
+    start = time.perf_counter()
+    with open(csv_path, 'r', newline='') as f:
+        summary = import_guests(storage, event['id'], f)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed:7.2f} s  {rows / elapsed:10.0f} rows/s  {summary['added']} added, "
+          f"{summary['duplicates']} duplicates, {summary['invalid']} invalid")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'guests.csv')
+        write_csv(csv_path, rows)
+        print(f"{rows} rows")
+        run('sqlite', SQLiteStorage(os.path.join(tmp, 'bench.db')), csv_path, rows)
+        run('json', JSONStorage(os.path.join(tmp, 'users.json'),
+                                os.path.join(tmp, 'events.json')), csv_path, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Micro-benchmark: cost of building one invitation message
+
+Compares the original per-guest MIMEMultipart + f-string construction with
+InvitationTemplate, which formats the event text once per event.
+
+    python benchmarks/bench_invitations.py [guests]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from email_service import InvitationTemplate, INVITATION_BODY
+
+EVENT = {'name': 'Annual Gala', 'date': '2026-12-01', 'location': 'Main Hall',
+         'password': 'x7!Kq2#pLm9@'}
+
+
+def legacy_message(guest):
+    message = MIMEMultipart()
+    message["From"] = "events@example.com"
+    message["To"] = guest['email']
+    message["Subject"] = f"Invitation: {EVENT['name']}"
+    body = INVITATION_BODY.format(guest_name=guest['name'], event_name=EVENT['name'],
+                                  event_date=EVENT['date'], event_location=EVENT['location'],
+                                  invitation_link=guest['link'], event_password=EVENT['password'])
+    message.attach(MIMEText(body, "plain"))
+    return message.as_bytes()
+
+
+def template_messages(guests):
+    template = InvitationTemplate.for_event("events@example.com", EVENT)
+    for _, message in template.messages(guests):
+        yield message.as_bytes()
+
+
+def guests(count):
+    for i in range(count):
+        yield {'name': f'Guest {i}', 'email': f'guest{i}@example.com',
+               'link': f'http://yourapp.com/events/1/join?token={i:016d}'}
+
+
+def run(label, build, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in build(count):
+        pass
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed / count * 1e6:8.1f} us/message   peak {peak / 1024:8.1f} KiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{count} messages")
+    run('legacy', lambda n: (legacy_message(g) for g in guests(n)), count)
+    run('template', lambda n: template_messages(guests(n)), count)
+
+
+if __name__ == '__main__':
+    main()
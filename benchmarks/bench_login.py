@@ -0,0 +1,79 @@
+"""Benchmark: login latency as the number of users grows
+
+Each login is a username lookup plus a password check. The lookup is an
+index hit in both backends, so latency should stay flat as users grow and
+be dominated by the scrypt cost (PASSWORD_HASH_COST, or --cost here).
+
+    python benchmarks/bench_login.py [--cost N] [user counts...]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import json_storage
+from passwords import hash_password, verify_password
+from storage import SQLiteStorage
+
+
+def seed_sqlite(path, count, stored):
+    storage = SQLiteStorage(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany('INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+                         ((f'user{i}', f'user{i}@example.com', stored) for i in range(count)))
+    conn.close()
+    return storage
+
+
+def seed_json(directory, count, stored):
+    users_file = os.path.join(directory, 'users.json')
+    with open(users_file, 'w') as f:
+        json.dump([{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': stored}
+                   for i in range(count)], f)
+    return json_storage.JSONStorage(users_file, os.path.join(directory, 'events.json'))
+
+
+def time_logins(storage, count, logins=20):
+    samples = []
+    lookups = []
+    for i in range(logins):
+        username = f'user{(i * 7919) % count}'
+        start = time.perf_counter()
+        user = storage.get_user(username)
+        looked_up = time.perf_counter()
+        assert verify_password(user['password'], 'correct horse')
+        samples.append(time.perf_counter() - start)
+        lookups.append(looked_up - start)
+    return statistics.median(samples), statistics.median(lookups)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cost', type=int, default=None)
+    parser.add_argument('counts', nargs='*', type=int, default=[1000, 10000, 100000, 300000])
+    args = parser.parse_args()
+
+    # Every user shares one hash so seeding does not take hours
+    stored = hash_password('correct horse', args.cost)
+    print(f"hash: {stored.split('$')[0]} cost {stored.split('$')[1]}")
+    print(f"{'backend':<8} {'users':>8} {'login ms':>10} {'lookup us':>10}")
+    for count in args.counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            backends = [('sqlite', seed_sqlite(os.path.join(tmp, 'bench.db'), count, stored)),
+                        ('json', seed_json(tmp, count, stored))]
+            for label, storage in backends:
+                storage.get_user('user0')  # warm the JSON cache
+                login, lookup = time_logins(storage, count)
+                print(f"{label:<8} {count:>8} {login * 1000:>10.2f} {lookup * 1e6:>10.1f}")
+            json_storage._repositories.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: memory of events held as dicts versus Event/Guest records
+
+Builds a synthetic events file, parses it as the JSON backend does, and
+measures the heap (tracemalloc) held by the parsed dicts and by the same
+data converted to records, plus the time to convert each way.
+
+    python benchmarks/bench_records.py [events] [guests per event]
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from records import Event
+
+
+def synthetic_file(count, guests):
+    return json.dumps([{
+        'id': i,
+        'name': f'Event {i}',
+        'date': f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        'location': f'Venue {i % 50}',
+        'description': 'Synthetic benchmark event',
+        'creator': f'user{i % 100}',
+        'password': 'x7!Kq2#pLm9@',
+        'created_at': f'2026-01-01T12:00:{i % 60:02d}.{i % 999999 + 1:06d}',
+        'guests': [{'name': f'Guest {j}', 'email': f'guest{j}@e{i}.example.com',
+                    'invited_at': f'2026-01-02T09:{j % 60:02d}:00.{j % 999999 + 1:06d}',
+                    'status': ('Pending', 'Accepted', 'Declined')[j % 3]}
+                   for j in range(guests)],
+    } for i in range(1, count + 1)])
+
+
+def held(build):
+    """Return (result, bytes still allocated by build) measured with tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    guests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    raw = synthetic_file(count, guests)
+    total = count * guests
+    print(f"{count} events, {guests} guests each ({total} guests)")
+
+    dicts, dict_bytes = held(lambda: json.loads(raw))
+    records, record_bytes = held(lambda: [Event.from_dict(e) for e in json.loads(raw)])
+    assert [e.to_dict() for e in records] == dicts
+
+    start = time.perf_counter()
+    [Event.from_dict(e) for e in dicts]
+    to_records = time.perf_counter() - start
+    start = time.perf_counter()
+    [e.to_dict() for e in records]
+    to_dicts = time.perf_counter() - start
+
+    print(f"{'':<8} {'MB':>8} {'bytes/guest':>12}")
+    print(f"{'dicts':<8} {dict_bytes / 1e6:>8.1f} {dict_bytes / total:>12.0f}")
+    print(f"{'records':<8} {record_bytes / 1e6:>8.1f} {record_bytes / total:>12.0f}")
+    print(f"saved {1 - record_bytes / dict_bytes:.0%}; "
+          f"dicts -> records {to_records * 1e6 / total:.2f} us/guest, "
+          f"records -> dicts {to_dicts * 1e6 / total:.2f} us/guest")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""Load test: Flask routes against a synthetic dataset
+
+Seeds a fresh database (or JSON or sharded JSON files) with --events events spread over
+--users users and --guests guests per event, then drives dashboard,
+events, manage_guests and create_event two ways:
+
+    client  Flask's test client in this process, one request at a time,
+            so latency is the app's own cost
+    http    a threaded WSGI server on localhost and --concurrency HTTP
+            clients, so latency includes queueing under load
+
+Reports p50/p95/p99 latency, throughput and peak RSS per route and writes
+the run as JSON (--output) for comparing runs. Several --events sizes are
+each run in their own process so RSS and caches start clean.
+
+    python benchmarks/bench_routes.py --events 1000 100000 --guests 10 --output results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'bench-password'
+BATCH = 10000
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def synthetic_events(args):
+    """Yield (user index, event dict, guest list) for the whole dataset"""
+    start = date(2025, 1, 1)
+    created = datetime(2024, 1, 1)
+    for i in range(args.events):
+        event = {
+            'name': f'Event {i}',
+            'date': (start + timedelta(days=i % 730)).isoformat(),
+            'location': f'Venue {i % 50}',
+            'description': 'Synthetic benchmark event',
+            'password': 'x7!Kq2#pLm9@',
+            'created_at': (created + timedelta(seconds=i)).isoformat(),
+        }
+        guests = [{'name': f'Guest {j}', 'email': f'guest{j}@e{i}.example.com',
+                   'invited_at': event['created_at'], 'status': 'Pending'}
+                  for j in range(args.guests)]
+        yield i % args.users, event, guests
+
+
+def seed_sqlite(args, stored):
+    from storage import SQLiteStorage, DB_FILE
+    storage = SQLiteStorage(DB_FILE)
+    conn = sqlite3.connect(DB_FILE)
+    with conn:
+        conn.executemany('INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+                         ((f'bench{u}', f'bench{u}@example.com', stored) for u in range(args.users)))
+        events = []
+        guests = []
+        for event_id, (user, event, event_guests) in enumerate(synthetic_events(args), 1):
+            events.append((event_id, user + 1, event['name'], event['date'], event['location'],
+                           event['description'], event['password'], event['created_at']))
+            guests.extend((event_id, g['name'], g['email'], g['status'], g['invited_at'])
+                          for g in event_guests)
+            if len(events) >= BATCH or len(guests) >= BATCH:
+                flush_sqlite(conn, events, guests)
+        flush_sqlite(conn, events, guests)
+    conn.close()
+    storage.check_stats(repair=True)
+    storage.close()
+
+
+def flush_sqlite(conn, events, guests):
+    conn.executemany(
+        'INSERT INTO events (id, user_id, name, date, location, description, password, created_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', events)
+    conn.executemany(
+        'INSERT INTO guests (event_id, name, email, status, invited_at) VALUES (?, ?, ?, ?, ?)',
+        guests)
+    events.clear()
+    guests.clear()
+
+
+def seed_json(args, stored):
+    with open('users.json', 'w') as f:
+        json.dump([{'username': f'bench{u}', 'email': f'bench{u}@example.com', 'password': stored}
+                   for u in range(args.users)], f)
+    with open('events.json', 'w') as f:
+        json.dump([dict(event, id=event_id, creator=f'bench{user}', guests=guests)
+                   for event_id, (user, event, guests) in enumerate(synthetic_events(args), 1)], f)
+
+
+def seed_sharded(args, stored):
+    from sharded_storage import SHARD_DIR, SHARDS, reshard
+    seed_json(args, stored)
+    reshard(SHARD_DIR, SHARDS, source='events.json')
+    os.remove('events.json')
+
+
+SEEDERS = {'sqlite': seed_sqlite, 'json': seed_json, 'sharded': seed_sharded}
+
+
+def scenarios(event_id):
+    """(name, method, path, form) for each route under test"""
+    return [
+        ('dashboard', 'GET', '/dashboard', None),
+        ('events', 'GET', '/events', None),
+        ('api_events', 'GET', '/api/events?limit=50', None),
+        ('manage_guests', 'GET', f'/events/{event_id}/guests', None),
+        ('create_event', 'POST', '/events/create',
+         {'name': 'Bench event', 'date': '2030-06-01', 'location': 'Bench Hall',
+          'description': 'created by bench_routes'}),
+    ]
+
+
+def summarise(name, mode, latencies, elapsed, errors, concurrency):
+    latencies.sort()
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 3)
+
+    return {
+        'route': name,
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_client(app, args, event_id):
+    client = app.app.test_client()
+    client.post('/login', data={'username': 'bench0', 'password': PASSWORD})
+    results = []
+    for name, method, path, form in scenarios(event_id):
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            began = time.perf_counter()
+            response = client.open(path, method=method, data=form)
+            latencies.append(time.perf_counter() - began)
+            errors += response.status_code >= 400
+        results.append(summarise(name, 'client', latencies, time.perf_counter() - start,
+                                 errors, 1))
+    return results
+
+
+def http_login(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/login', body=urlencode({'username': 'bench0', 'password': PASSWORD}),
+                 headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def run_http(app, args, event_id):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    cookie = http_login(port)
+    results = []
+    try:
+        for name, method, path, form in scenarios(event_id):
+            body = urlencode(form) if form else None
+            headers = {'Cookie': cookie}
+            if body:
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            latencies = []
+            errors = []
+            lock = threading.Lock()
+
+            def worker(count):
+                conn = http.client.HTTPConnection('127.0.0.1', port)
+                local = []
+                failed = 0
+                for _ in range(count):
+                    began = time.perf_counter()
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                    local.append(time.perf_counter() - began)
+                    failed += response.status >= 400
+                conn.close()
+                with lock:
+                    latencies.extend(local)
+                    errors.append(failed)
+
+            per_client = max(1, args.requests // args.concurrency)
+            threads = [threading.Thread(target=worker, args=(per_client,))
+                       for _ in range(args.concurrency)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            results.append(summarise(name, 'http', latencies, time.perf_counter() - start,
+                                     sum(errors), args.concurrency))
+    finally:
+        server.shutdown()
+    return results
+
+
+def run_one(args):
+    """Seed one dataset in a scratch directory and benchmark every route"""
+    tmp = tempfile.mkdtemp()
+    # app.py opens its data files relative to the working directory
+    os.chdir(tmp)
+    os.environ['EVENT_PLANNER_STORAGE'] = args.backend
+    os.environ['INVITATION_WORKERS'] = '0'
+    try:
+        from passwords import hash_password
+        stored = hash_password(PASSWORD, args.hash_cost)
+        start = time.perf_counter()
+        SEEDERS[args.backend](args, stored)
+        seed_seconds = time.perf_counter() - start
+
+        import app
+        # bench0 owns events 1, 1 + users, 1 + 2 * users, ...
+        event_id = 1
+        results = []
+        if 'client' in args.modes:
+            results += run_client(app, args, event_id)
+        if 'http' in args.modes:
+            results += run_http(app, args, event_id)
+        return {
+            'dataset': {'backend': args.backend, 'events': args.events, 'users': args.users,
+                        'guests_per_event': args.guests,
+                        'seed_seconds': round(seed_seconds, 2)},
+            'results': results,
+        }
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def print_run(run):
+    dataset = run['dataset']
+    print(f"\n{dataset['backend']}: {dataset['events']} events, "
+          f"{dataset['guests_per_event']} guests/event (seeded in {dataset['seed_seconds']}s)")
+    print(f"{'route':<14} {'mode':<6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'req/s':>8} {'errors':>6} {'RSS MB':>8}")
+    for r in run['results']:
+        print(f"{r['route']:<14} {r['mode']:<6} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['throughput_rps']:>8.0f} {r['errors']:>6} "
+              f"{r['peak_rss_mb'] or 0:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--guests', type=int, default=10, help='guests per event')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--backend', choices=sorted(SEEDERS), default='sqlite')
+    parser.add_argument('--modes', nargs='+', choices=['client', 'http'], default=['client', 'http'])
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and mode')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--hash-cost', type=int, default=10)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    if len(args.events) == 1:
+        runs = [run_one(argparse.Namespace(**dict(vars(args), events=args.events[0])))]
+    else:
+        # One process per size, so RSS and caches do not carry over
+        runs = []
+        for events in args.events:
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+                output = f.name
+            command = [sys.executable, os.path.abspath(__file__), '--events', str(events),
+                       '--guests', str(args.guests), '--users', str(args.users),
+                       '--backend', args.backend, '--modes', *args.modes,
+                       '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+                       '--hash-cost', str(args.hash_cost), '--output', output]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            with open(output) as f:
+                runs.extend(json.load(f)['runs'])
+            os.remove(output)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs,
+    }
+    for run in runs:
+        print_run(run)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Load test: a burst of RSVPs against one event
+
+Seeds an event with N invited guests, then has concurrent clients answer
+through the join endpoint (Flask test client). Each guest answers twice, so
+half the requests exercise the idempotent no-write path. Reports throughput
+and latency percentiles, then checks the per-event counters.
+
+    python benchmarks/bench_rsvp.py [--guests N] [--clients N] [--backend sqlite|json|sharded]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guests', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--backend', default='sqlite')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    # app.py opens its database relative to the working directory
+    os.chdir(tmp)
+    os.environ['EVENT_PLANNER_STORAGE'] = args.backend
+    os.environ['INVITATION_WORKERS'] = '0'
+    import app
+
+    app.storage.create_user('host', 'x', 'host@example.com')
+    event = app.storage.create_event({'name': 'Launch', 'date': '2030-01-01', 'location': 'Hall',
+                                      'description': '', 'password': 'x', 'creator': 'host'})
+    emails = [f'guest{i}@example.com' for i in range(args.guests)]
+    app.storage.add_guests(event['id'], [{'name': 'Guest', 'email': e} for e in emails])
+    tokens = app.invitation_tokens.issue(event['id'], emails)
+
+    # Even guests accept, odd guests decline; every answer is sent twice
+    work = [(tokens[e], 'accept' if i % 2 == 0 else 'decline') for i, e in enumerate(emails)] * 2
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(items):
+        test_client = app.app.test_client()
+        local = []
+        for token, response in items:
+            start = time.perf_counter()
+            r = test_client.post(f"/events/{event['id']}/join?token={token}",
+                                 json={'response': response},
+                                 headers={'Accept': 'application/json'})
+            local.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(work[i::args.clients],))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    counts = app.storage.rsvp_counts(event['id'])
+    print(f"backend {args.backend}, {args.guests} guests, {args.clients} clients, "
+          f"{len(work)} requests")
+    print(f"throughput {len(work) / elapsed:8.0f} RSVP/s")
+    print(f"latency ms p50 {percentile(latencies, 0.5) * 1000:.2f} "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} "
+          f"mean {statistics.mean(latencies) * 1000:.2f}")
+    print(f"counters {counts}  errors {len(errors)}")
+    expected = {'Pending': 0, 'Accepted': (args.guests + 1) // 2, 'Declined': args.guests // 2}
+    if counts != expected:
+        print(f"counter mismatch, expected {expected}")
+    app.invitation_queue.stop()
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Codecs for the JSON data files, with on-disk format detection
+
+Three formats are understood: compact JSON (stdlib, or orjson when it is
+installed), legacy indented JSON, and msgpack (when installed). Readers
+detect the format from the first byte, so files in any of them load.
+
+Convert files in place between formats:
+
+    python data_codecs.py --to msgpack events.json users.json
+"""
+import argparse
+import json
+import os
+
+from records import to_data
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Codec used for new files and after migrations; see get_codec
+CODEC = os.environ.get('EVENT_PLANNER_CODEC', '')
+
+# First bytes of a msgpack array or map, which JSON files never start with
+_MSGPACK_LEADS = set(range(0x80, 0xa0)) | {0xdc, 0xdd, 0xde, 0xdf}
+
+
+class JSONCodec:
+    """Stdlib JSON without indentation"""
+    name = 'json'
+    format = 'json'
+
+    def dumps(self, data):
+        return json.dumps(data, separators=(',', ':'), default=to_data).encode()
+
+    def loads(self, raw):
+        return json.loads(raw)
+
+
+class IndentedJSONCodec(JSONCodec):
+    """The original indent=4 layout, for files people edit by hand"""
+    name = 'json-indent'
+
+    def dumps(self, data):
+        return json.dumps(data, indent=4, default=to_data).encode()
+
+
+class OrjsonCodec:
+    """orjson: the same compact JSON, several times faster"""
+    name = 'orjson'
+    format = 'json'
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=to_data)
+
+    def loads(self, raw):
+        return orjson.loads(raw)
+
+
+class MsgpackCodec:
+    """msgpack binary format: smaller files and faster parsing than JSON"""
+    name = 'msgpack'
+    format = 'msgpack'
+
+    def dumps(self, data):
+        return msgpack.packb(data, use_bin_type=True, default=to_data)
+
+    def loads(self, raw):
+        try:
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+        except Exception as e:
+            # Some msgpack errors are not ValueErrors; callers catch ValueError
+            raise ValueError(f"Invalid msgpack data: {e}") from e
+
+
+CODECS = {codec.name: codec for codec in [JSONCodec(), IndentedJSONCodec()]}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec()
+if msgpack is not None:
+    CODECS['msgpack'] = MsgpackCodec()
+
+
+def get_codec(name=None):
+    """Return the named codec, defaulting to EVENT_PLANNER_CODEC or the fastest JSON one"""
+    name = name or CODEC or ('orjson' if 'orjson' in CODECS else 'json')
+    if name not in CODECS:
+        raise ValueError(f"Codec {name} is not available (installed: {', '.join(CODECS)})")
+    return CODECS[name]
+
+
+def detect(raw):
+    """Return the fastest codec that can read raw, judged by its first byte"""
+    start = raw.lstrip()[:1]
+    if start and start[0] in _MSGPACK_LEADS:
+        if 'msgpack' not in CODECS:
+            raise ValueError("File is in msgpack format but msgpack is not installed")
+        return CODECS['msgpack']
+    return CODECS['orjson'] if 'orjson' in CODECS else CODECS['json']
+
+
+def load_file(filename):
+    """Read and decode a data file in any supported format; [] if it is missing or empty"""
+    try:
+        with open(filename, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return []
+    if not raw.strip():
+        return []
+    return detect(raw).loads(raw)
+
+
+def convert(filename, codec):
+    """Rewrite filename with codec, under the file lock; return (old bytes, new bytes)"""
+    from file_lock import FileLock, atomic_write
+    with FileLock(filename):
+        before = os.path.getsize(filename) if os.path.exists(filename) else 0
+        data = load_file(filename)
+        encoded = codec.dumps(data)
+        atomic_write(filename, lambda f: f.write(encoded), mode='wb')
+    return before, len(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert data files between formats")
+    parser.add_argument('--to', required=True, choices=sorted(CODECS))
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args()
+    codec = get_codec(args.to)
+    for filename in args.files:
+        before, after = convert(filename, codec)
+        print(f"{filename}: {before} -> {after} bytes ({codec.name})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,56 +1,356 @@
 import smtplib
 from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import json
+import asyncio
+import queue
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-class EmailService:
-    def __init__(self, smtp_server, port, email, password):
-        self.smtp_server = smtp_server
-        self.port = port
-        self.email = email
-        self.password = password
-    
-    def send_invitation(self, guest_email, guest_name, event_name, event_date, 
-                       event_location, invitation_link, event_password):
-        """Send an invitation email to a guest"""
-        try:
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = self.email
-            message["To"] = guest_email
-            message["Subject"] = f"Invitation: {event_name}"
-            
-            # Email body
-            body = f"""
+INVITATION_BODY = """
             Dear {guest_name},
-            
+
             You are invited to attend: {event_name}
-            
+
             Event Details:
             - Date: {event_date}
             - Location: {event_location}
-            
+
             To accept this invitation, please use the following link:
             {invitation_link}
-            
+
             Event Access Password: {event_password}
-            
+
             We look forward to seeing you there!
-            
+
             Best regards,
             Event Planner Team
             """
-            
-            message.attach(MIMEText(body, "plain"))
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.port) as server:
+
+# Per-guest placeholders, split out of INVITATION_BODY before any event data goes in
+GUEST_FIELDS = re.compile(r'\{(guest_name|invitation_link)\}')
+
+# Replies after which smtplib has reset the session, so the connection stays usable
+REJECTIONS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def _connection_lost(error):
+    """True if the connection itself failed, rather than the server refusing a message
+
+    SMTPException subclasses OSError, so `except OSError` alone would also
+    catch every SMTP reply.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class InvitationTemplate:
+    """Invitation email for one event, pre-rendered except for the guest fields
+
+    The event-level text is formatted once; each message only joins in the
+    guest's name and link and sets the To header.
+    """
+
+    def __init__(self, sender, event_name, event_date, event_location, event_password):
+        self.sender = sender
+        self.subject = f"Invitation: {event_name}"
+        event_fields = {'event_name': event_name, 'event_date': event_date,
+                        'event_location': event_location, 'event_password': event_password}
+        # Even indices are literal text, odd indices are field names. Splitting
+        # the constant template first means no event value can pose as a field.
+        self.parts = [part if i % 2 else part.format(**event_fields)
+                      for i, part in enumerate(GUEST_FIELDS.split(INVITATION_BODY))]
+
+    @classmethod
+    def for_event(cls, sender, event):
+        return cls(sender, event['name'], event['date'], event['location'], event['password'])
+
+    def render(self, guest_email, guest_name, invitation_link):
+        """Build the message for one guest"""
+        fields = {'guest_name': guest_name, 'invitation_link': invitation_link}
+        body = ''.join(fields[part] if i % 2 else part for i, part in enumerate(self.parts))
+        message = MIMEText(body, "plain")
+        message["From"] = self.sender
+        message["To"] = guest_email
+        message["Subject"] = self.subject
+        return message
+
+    def messages(self, guests):
+        """Yield (guest, message) pairs one at a time for dicts with 'name', 'email', 'link'"""
+        for guest in guests:
+            yield guest, self.render(guest['email'], guest['name'], guest['link'])
+
+
+class SMTPConnectionPool:
+    """Bounded pool of authenticated SMTP connections
+
+    At most `size` connections exist at once. A connection is reused until it
+    has sent `max_messages` messages, then closed and replaced on demand.
+    """
+
+    def __init__(self, connect, size=4, max_messages=100):
+        self._connect = connect
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+        self.reconnects = 0
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is returned to the pool unless the block raised
+
+        A refused message (see REJECTIONS) leaves the connection usable, so
+        it goes back to the pool too.
+        """
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _PooledConnection(self._connect())
+                self.opened += 1
+            try:
+                yield conn
+            except REJECTIONS:
+                self._release(conn)
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn)
+
+    def _release(self, conn):
+        if conn.sent < self.max_messages:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _PooledConnection:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+
+    def send(self, message):
+        self.smtp.send_message(message)
+        self.sent += 1
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class EmailService:
+    def __init__(self, smtp_server, port, email, password, use_tls=True,
+                 max_connections=4, max_messages_per_connection=100):
+        self.smtp_server = smtp_server
+        self.port = port
+        self.email = email
+        self.password = password
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.pool = SMTPConnectionPool(self._connect, max_connections,
+                                       max_messages_per_connection)
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP connection"""
+        server = smtplib.SMTP(self.smtp_server, self.port, timeout=30)
+        try:
+            if self.use_tls:
                 server.starttls()
+            if self.password:
                 server.login(self.email, self.password)
-                server.send_message(message)
-            
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _build_message(self, guest_email, guest_name, event_name, event_date,
+                       event_location, invitation_link, event_password):
+        template = InvitationTemplate(self.email, event_name, event_date,
+                                      event_location, event_password)
+        return template.render(guest_email, guest_name, invitation_link)
+
+    def _deliver(self, message):
+        """Send one message over a pooled connection, reconnecting once if it was lost
+
+        Refusals from the server are raised straight away, not resent.
+        """
+        try:
+            with self.pool.connection() as conn:
+                conn.send(message)
+        except OSError as e:
+            if not _connection_lost(e):
+                raise
+            self.pool.reconnects += 1
+            with self.pool.connection() as conn:
+                conn.send(message)
+
+    def send_invitation(self, guest_email, guest_name, event_name, event_date,
+                       event_location, invitation_link, event_password):
+        """Send an invitation email to a guest"""
+        try:
+            message = self._build_message(guest_email, guest_name, event_name, event_date,
+                                          event_location, invitation_link, event_password)
+            self._deliver(message)
             return True
-            
+
         except Exception as e:
             print(f"Failed to send email to {guest_email}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def send_invitations(self, event, guests):
+        """Send invitations to many guests concurrently over pooled connections
+
+        `guests` are dicts with 'name', 'email' and 'link'. Returns one
+        {'email', 'sent', 'error'} dict per guest, in the same order.
+        Messages are built as they are sent, with at most two per connection
+        waiting, so memory does not grow with the guest list.
+        """
+        def send(guest, message):
+            try:
+                self._deliver(message)
+                return {'email': guest['email'], 'sent': True, 'error': None}
+            except Exception as e:
+                return {'email': guest['email'], 'sent': False, 'error': str(e)}
+
+        template = InvitationTemplate.for_event(self.email, event)
+        in_flight = threading.BoundedSemaphore(self.max_connections * 2)
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.max_connections) as executor:
+            for guest, message in template.messages(guests):
+                in_flight.acquire()
+                future = executor.submit(send, guest, message)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append(future)
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Close the pooled connections"""
+        self.pool.close()
+
+
+class TokenBucket:
+    """Asyncio token bucket allowing `rate` sends per second, bursting to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity,
+                                       self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _is_transient(error):
+    """True for 4xx SMTP replies, which are worth retrying later"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return False
+
+
+class AsyncEmailService(EmailService):
+    """EmailService that sends over a few SMTP sessions driven by asyncio
+
+    Each of `sessions` tasks owns one connection and runs the blocking SMTP
+    calls in a worker thread. Sends are paced by a token bucket of `rate`
+    messages per second, at most `per_domain` messages are in flight per
+    recipient domain, and 4xx replies are retried with exponential backoff.
+    per_domain only limits anything while it is below sessions.
+    """
+
+    def __init__(self, smtp_server, port, email, password, use_tls=True,
+                 sessions=4, rate=10.0, burst=None, per_domain=2,
+                 max_retries=4, backoff=1.0):
+        super().__init__(smtp_server, port, email, password, use_tls,
+                         max_connections=sessions)
+        self.sessions = sessions
+        self.rate = rate
+        self.burst = burst
+        self.per_domain = per_domain
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retries = 0
+
+    async def send_invitations_async(self, event, guests):
+        """Send invitations and return one {'email', 'sent', 'error'} dict per guest"""
+        template = InvitationTemplate.for_event(self.email, event)
+        bucket = TokenBucket(self.rate, self.burst)
+        domains = {}
+        results = [None] * len(guests)
+        pending = asyncio.Queue()
+        for index, guest in enumerate(guests):
+            pending.put_nowait((index, guest))
+
+        async def send(smtp, guest):
+            message = template.render(guest['email'], guest['name'], guest['link'])
+            domain = guest['email'].rpartition('@')[2].lower()
+            limit = domains.setdefault(domain, asyncio.Semaphore(self.per_domain))
+            for attempt in range(self.max_retries + 1):
+                async with limit:
+                    await bucket.acquire()
+                    try:
+                        if smtp is None:
+                            smtp = await asyncio.to_thread(self._connect)
+                        await asyncio.to_thread(smtp.send_message, message)
+                        return smtp, None
+                    except OSError as e:
+                        error = e
+                        if _connection_lost(e):
+                            # Drop it; a new session is opened for the retry
+                            if smtp is not None:
+                                await asyncio.to_thread(_PooledConnection(smtp).close)
+                            smtp = None
+                        elif not _is_transient(e):
+                            return smtp, e
+                if attempt < self.max_retries:
+                    self.retries += 1
+                    await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+            return smtp, error
+
+        async def session():
+            smtp = None
+            try:
+                while not pending.empty():
+                    index, guest = pending.get_nowait()
+                    smtp, error = await send(smtp, guest)
+                    results[index] = {'email': guest['email'], 'sent': error is None,
+                                      'error': str(error) if error else None}
+            finally:
+                if smtp is not None:
+                    await asyncio.to_thread(_PooledConnection(smtp).close)
+
+        await asyncio.gather(*(session() for _ in range(self.sessions)))
+        return results
+
+    def send_invitations(self, event, guests):
+        """Blocking wrapper around send_invitations_async"""
+        return asyncio.run(self.send_invitations_async(event, guests))
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from storage import StorageError
+
+# Give up waiting for another process after this many seconds
+LOCK_TIMEOUT = 10.0
+
+
+def _try_lock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Advisory inter-process lock on a <path>.lock file
+
+    Acquisition polls with exponential backoff until LOCK_TIMEOUT, counting
+    retries and time spent waiting. The lock is re-entrant within a process,
+    but callers must serialize threads themselves (JSONRepository holds its
+    RLock while using it).
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path + '.lock'
+        self.timeout = timeout
+        self._fd = None
+        self._depth = 0
+        self.acquired = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+
+    def acquire(self):
+        if self._depth:
+            self._depth += 1
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        start = time.monotonic()
+        delay = 0.001
+        while True:
+            try:
+                _try_lock(fd)
+                break
+            except OSError:
+                if time.monotonic() - start >= self.timeout:
+                    os.close(fd)
+                    self.timeouts += 1
+                    raise StorageError(f"Timed out waiting for lock on {self.path}")
+                self.retries += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
+        self.wait_time += time.monotonic() - start
+        self.acquired += 1
+        self._fd = fd
+        self._depth = 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def stats(self):
+        """Return acquisition, retry and wait counters"""
+        return {
+            'acquired': self.acquired,
+            'retries': self.retries,
+            'timeouts': self.timeouts,
+            'wait_seconds': round(self.wait_time, 6),
+        }
+
+
+def atomic_write(filename, write, mode='w'):
+    """Call write(f) on a temp file next to filename, then swap it into place
+
+    Readers see either the old file or the new one, never a partial write.
+    Pass mode='wb' to write bytes.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + '.',
+                               suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
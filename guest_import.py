@@ -0,0 +1,76 @@
+import codecs
+import csv
+import io
+import re
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Rows per import; larger files are rejected rather than half-imported
+MAX_IMPORT_ROWS = 1_000_000
+
+
+def validate_email(email):
+    """Validate email format"""
+    return EMAIL_PATTERN.match(email) is not None
+
+
+def read_guest_rows(lines):
+    """Yield (line_number, name, email) for each row of a name,email CSV
+
+    `lines` is any iterable of text lines, so files are read as a stream. A
+    header row naming 'name' and 'email' columns is honoured in any order;
+    without one the first two columns are taken as name, email.
+    """
+    reader = csv.reader(lines)
+    name_col, email_col = 0, 1
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        header = [cell.strip().lower() for cell in row]
+        if reader.line_num == 1 and 'email' in header and 'name' in header:
+            name_col, email_col = header.index('name'), header.index('email')
+            continue
+        name = row[name_col].strip() if len(row) > name_col else ''
+        email = row[email_col].strip() if len(row) > email_col else ''
+        yield reader.line_num, name, email
+
+
+def import_guests(storage, event_id, stream, encoding='utf-8'):
+    """Validate, dedupe and add every guest in a CSV stream in one write
+
+    `stream` is a binary or text file object. Returns a summary dict with
+    the counts of added, duplicate and invalid rows and the first few errors.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        # Only iteration is needed, so uploads that are not full io objects
+        # (Werkzeug's SpooledTemporaryFile before Python 3.11) work too
+        stream = codecs.iterdecode(stream, encoding)
+
+    seen = set()
+    batch = []
+    duplicates = 0
+    invalid = 0
+    errors = []
+    for line_number, name, email in read_guest_rows(stream):
+        if line_number > MAX_IMPORT_ROWS:
+            raise ValueError(f"CSV has more than {MAX_IMPORT_ROWS} rows")
+        if not name or not validate_email(email):
+            invalid += 1
+            if len(errors) < 10:
+                errors.append(f"Line {line_number}: invalid name or email")
+            continue
+        if email in seen:
+            duplicates += 1
+            continue
+        seen.add(email)
+        batch.append({'name': name, 'email': email})
+
+    added = storage.add_guests(event_id, batch) if batch else []
+    if added is None:
+        raise ValueError("Event not found")
+    return {
+        'added': len(added),
+        'duplicates': duplicates + len(batch) - len(added),
+        'invalid': invalid,
+        'errors': errors,
+    }
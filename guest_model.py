@@ -0,0 +1,57 @@
+from records import Guest
+from storage import RSVP_STATUSES
+
+
+class GuestListModel:
+    """Guests of one event, telling listeners about each change
+
+    Screens subscribe instead of re-reading the event, so adding or removing
+    a guest updates only the affected row and the counters.
+    Listeners are called as listener(change, guest) with change 'added' or
+    'removed'. Guests are kept as Guest records, since the screen holds
+    them for as long as it is open.
+    """
+
+    def __init__(self, event):
+        self.event_id = event['id']
+        self.guests = {g['email']: Guest.from_dict(g) for g in event['guests']}
+        self.status_counts = dict.fromkeys(RSVP_STATUSES, 0)
+        for guest in self.guests.values():
+            self._count(guest, 1)
+        self._listeners = []
+
+    def __len__(self):
+        return len(self.guests)
+
+    def __iter__(self):
+        return iter(self.guests.values())
+
+    def __contains__(self, email):
+        return email in self.guests
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _count(self, guest, delta):
+        self.status_counts[guest.status] = self.status_counts.get(guest.status, 0) + delta
+
+    def _notify(self, change, guest):
+        for listener in self._listeners:
+            listener(change, guest)
+
+    def add(self, guest):
+        """Record a guest already saved to storage"""
+        if guest['email'] in self.guests:
+            return
+        guest = Guest.from_dict(guest)
+        self.guests[guest.email] = guest
+        self._count(guest, 1)
+        self._notify('added', guest)
+
+    def remove(self, email):
+        """Forget a guest already removed from storage"""
+        guest = self.guests.pop(email, None)
+        if guest is None:
+            return
+        self._count(guest, -1)
+        self._notify('removed', guest)
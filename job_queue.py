@@ -0,0 +1,224 @@
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from storage import DB_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invitation_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    lease_until REAL,
+    claim_token TEXT
+);
+CREATE TABLE IF NOT EXISTS invitation_job_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    link TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    FOREIGN KEY (job_id) REFERENCES invitation_jobs (id)
+);
+CREATE INDEX IF NOT EXISTS idx_invitation_jobs_status ON invitation_jobs (status);
+CREATE INDEX IF NOT EXISTS idx_invitation_job_items_job ON invitation_job_items (job_id, status);
+"""
+
+
+def _item_status(result):
+    if result['sent']:
+        return 'sent'
+    return 'failed' if result['error'] is not None else 'prepared'
+
+
+class InvitationQueue:
+    """Durable queue of invitation jobs drained by background worker threads
+
+    A job holds one item per guest. Workers claim a job with a lease, hand its
+    pending items to `deliver` in batches and record each guest's outcome, so
+    progress survives restarts: a job whose worker died is picked up again
+    once its lease expires and only its pending items are retried. Each claim
+    gets a new token; a worker that finds its token replaced has lost the
+    job and stops before sending anything more.
+
+    `deliver(event_id, items)` receives dicts with 'name' and 'email' and
+    returns one {'email', 'sent', 'error', 'link'} dict per item. An item
+    neither sent nor failed (no mail server configured) is recorded as
+    'prepared': its link exists but nothing was emailed.
+    """
+
+    def __init__(self, deliver, db_file=DB_FILE, batch_size=50, lease_seconds=300,
+                 poll_interval=1.0):
+        self.deliver = deliver
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(invitation_jobs)')}
+            if 'claim_token' not in columns:
+                conn.execute('ALTER TABLE invitation_jobs ADD COLUMN claim_token TEXT')
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, event_id, guests):
+        """Queue invitations for guests and return the new job id"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO invitation_jobs (event_id, status, created_at, updated_at) '
+                "VALUES (?, 'queued', ?, ?)", (event_id, now, now))
+            job_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO invitation_job_items (job_id, name, email) VALUES (?, ?, ?)',
+                [(job_id, g['name'], g['email']) for g in guests])
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id):
+        """Return the job with per-guest progress, or None"""
+        conn = self._connect()
+        job = conn.execute('SELECT * FROM invitation_jobs WHERE id = ?', (job_id,)).fetchone()
+        if job is None:
+            return None
+        items = conn.execute(
+            'SELECT name, email, link, status, error FROM invitation_job_items '
+            'WHERE job_id = ? ORDER BY id', (job_id,)).fetchall()
+        counts = {'pending': 0, 'sent': 0, 'prepared': 0, 'failed': 0}
+        for item in items:
+            counts[item['status']] += 1
+        return {
+            'id': job['id'],
+            'event_id': job['event_id'],
+            'status': job['status'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at'],
+            'total': len(items),
+            **counts,
+            'guests': [dict(item) for item in items],
+        }
+
+    def claim(self):
+        """Lease the oldest runnable job to this worker; return it (with its claim_token) or None"""
+        conn = self._connect()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front so two workers cannot claim the same job
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            job = conn.execute(
+                "SELECT * FROM invitation_jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,)).fetchone()
+            if job is not None:
+                job = dict(job, claim_token=secrets.token_hex(16))
+                conn.execute(
+                    "UPDATE invitation_jobs SET status = 'running', lease_until = ?, "
+                    'updated_at = ?, claim_token = ? WHERE id = ?',
+                    (now + self.lease_seconds, datetime.now().isoformat(), job['claim_token'],
+                     job['id']))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return job
+
+    def _renew(self, conn, job):
+        """Extend the lease if this worker still holds the job; False if it was reclaimed"""
+        return conn.execute(
+            "UPDATE invitation_jobs SET lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND claim_token = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, datetime.now().isoformat(), job['id'],
+             job['claim_token'])).rowcount == 1
+
+    def run_job(self, job):
+        """Deliver every pending item of a claimed job, batch by batch
+
+        Stops as soon as the lease turns out to have passed to another worker,
+        so the two never send the same items.
+        """
+        conn = self._connect()
+        while True:
+            if self._stopping.is_set():
+                # Leave the rest for whoever claims the job after the lease expires
+                return
+            with conn:
+                if not self._renew(conn, job):
+                    return
+            items = conn.execute(
+                "SELECT id, name, email FROM invitation_job_items "
+                "WHERE job_id = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                (job['id'], self.batch_size)).fetchall()
+            if not items:
+                break
+            try:
+                results = self.deliver(job['event_id'], [dict(item) for item in items])
+            except Exception as e:
+                results = [{'email': item['email'], 'sent': False, 'error': str(e), 'link': None}
+                           for item in items]
+            with conn:
+                held = self._renew(conn, job)
+                if held:
+                    conn.executemany(
+                        'UPDATE invitation_job_items SET status = ?, error = ?, link = ? '
+                        'WHERE id = ?',
+                        [(_item_status(r), r['error'], r.get('link'), item['id'])
+                         for item, r in zip(items, results)])
+            if not held:
+                return
+        with conn:
+            conn.execute(
+                "UPDATE invitation_jobs SET status = 'done', lease_until = NULL, updated_at = ? "
+                'WHERE id = ? AND claim_token = ?',
+                (datetime.now().isoformat(), job['id'], job['claim_token']))
+
+    def work_once(self):
+        """Run one job if there is one; return True if a job was run"""
+        job = self.claim()
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                if self.work_once():
+                    continue
+            except Exception as e:
+                print(f"Invitation worker error: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self, workers=2):
+        """Start background worker threads"""
+        for _ in range(workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def stop(self):
+        """Ask the workers to finish their current batch and exit"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._workers:
+            thread.join()
+        self._workers = []
@@ -0,0 +1,760 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from data_codecs import CODEC, detect, get_codec
+from file_lock import FileLock, atomic_write
+from metrics import span
+from records import Event, Guest
+from storage import (StorageError, SORT_FIELDS, RECENT_EVENTS, RSVP_STATUSES,
+                     encode_cursor, decode_cursor)
+
+# Data storage files
+USERS_FILE = "users.json"
+EVENTS_FILE = "events.json"
+
+# Append guest changes to events.json.journal instead of rewriting events.json
+JOURNAL_ENABLED = os.environ.get('EVENT_PLANNER_JOURNAL', '') not in ('', '0')
+# Fold the journal back into events.json after this many records
+COMPACT_EVERY = 1000
+# Attempts to parse a data file before treating it as corrupt
+READ_ATTEMPTS = 3
+
+
+class JSONRepository:
+    """Parsed contents of one JSON data file, cached until the file changes
+
+    Writes go to a temp file that replaces the original atomically, under an
+    advisory file lock so several worker processes can share the file. Use
+    transaction() around read-modify-write cycles.
+
+    The file may be JSON or msgpack (see data_codecs). Writes keep the
+    format the file was read in unless a codec is named here or by
+    EVENT_PLANNER_CODEC.
+    """
+
+    def __init__(self, filename, codec=None):
+        self.filename = filename
+        self.codec = get_codec(codec) if codec or CODEC else None
+        self._read_codec = None
+        self.lock = threading.RLock()
+        self.file_lock = FileLock(filename)
+        self.hits = 0
+        self.misses = 0
+        self.read_retries = 0
+        self._data = None
+        self._signature = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        delay = 0.01
+        for attempt in range(READ_ATTEMPTS):
+            try:
+                with open(self.filename, 'rb') as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                return []
+            if not raw.strip():
+                return []
+            try:
+                codec = detect(raw)
+                with span('json.parse'):
+                    data = codec.loads(raw)
+                self._read_codec = codec
+                return data
+            except ValueError as e:
+                error = e
+            # Possibly a writer that does not use atomic_write; try again
+            self.read_retries += 1
+            time.sleep(delay)
+            delay *= 2
+        # Never fall back to [] here: the next save would wipe the file
+        raise StorageError(f"{self.filename} is corrupt: {error}")
+
+    def load(self):
+        """Return the cached data, re-reading the file only if it changed on disk"""
+        with self.lock:
+            signature = self._stat()
+            if self._data is not None and signature == self._signature:
+                self.hits += 1
+                return self._data
+            self.misses += 1
+            self._data = self._read()
+            self._signature = signature
+            with span('json.index'):
+                self._loaded(self._data)
+            return self._data
+
+    def _loaded(self, data):
+        """Hook called after data has been (re)read from disk"""
+
+    @contextmanager
+    def transaction(self):
+        """Hold the thread and file locks and yield the current data"""
+        with self.lock, self.file_lock:
+            yield self.load()
+
+    def ensure_exists(self):
+        """Create the file with an empty list if it is missing"""
+        with self.transaction():
+            if not os.path.exists(self.filename):
+                self.save([])
+
+    def save(self, data):
+        """Write data to the file and keep it as the cached copy"""
+        with self.lock, self.file_lock:
+            try:
+                codec = self.codec or self._read_codec or get_codec()
+                with span('json.write'):
+                    atomic_write(self.filename, lambda f: f.write(codec.dumps(data)), mode='wb')
+            except Exception:
+                self.invalidate()
+                return False
+            self._data = data
+            self._signature = self._stat()
+            return True
+
+    def invalidate(self):
+        """Drop the cached copy so the next load re-reads the file"""
+        with self.lock:
+            self._data = None
+            self._signature = None
+
+    def stats(self):
+        """Return cache, read retry and lock counters"""
+        return {
+            'file': self.filename,
+            'hits': self.hits,
+            'misses': self.misses,
+            'read_retries': self.read_retries,
+            'lock': self.file_lock.stats(),
+        }
+
+
+class IdSequence:
+    """Monotonic id counter persisted in <filename>.seq, like sqlite_sequence
+
+    Ids are never reused, even after the newest event is deleted. Callers
+    must hold the data file's lock so two workers cannot draw the same id.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename + '.seq'
+
+    def current(self):
+        """Return the last id allocated, or 0"""
+        try:
+            with open(self.filename, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def next(self, floor=0):
+        """Allocate the next id, never lower than floor + 1"""
+        value = max(self.current(), floor) + 1
+        atomic_write(self.filename, lambda f: f.write(str(value)))
+        return value
+
+    def advance(self, value):
+        """Make sure later ids are above value"""
+        if value > self.current():
+            atomic_write(self.filename, lambda f: f.write(str(value)))
+
+
+def renumber_duplicates(events, last_id=0):
+    """Give each event whose id appeared earlier in events a new id; return the (old, new) pairs
+
+    Files written before IdSequence allocated ids as len(events) + 1, which
+    reuses ids after a delete. The first event keeps the id, as in
+    SQLiteStorage.import_json, and the rest get ids above last_id and every
+    id in events.
+    """
+    last_id = max([last_id] + [event['id'] for event in events])
+    seen = set()
+    changed = []
+    for event in events:
+        if event['id'] in seen:
+            last_id += 1
+            changed.append((event['id'], last_id))
+            event['id'] = last_id
+        seen.add(event['id'])
+    return changed
+
+
+class UserRepository(JSONRepository):
+    """Users file indexed by username and email"""
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.by_username = {}
+        self.emails = set()
+
+    def _loaded(self, data):
+        self.by_username = {u['username']: u for u in data}
+        self.emails = {u['email'] for u in data}
+
+
+class EventRepository(JSONRepository):
+    """Events file with indexes by id, by creator and by guest email
+
+    Events and guests are cached as Event/Guest records (see records.py)
+    to keep large files small in memory. The indexes are rebuilt whenever
+    the file is re-read and are kept up to date by JSONStorage on every
+    mutation, so lookups never scan the list.
+
+    With journal=True, guest additions, removals and RSVPs are appended as JSON
+    lines to <filename>.journal and replayed on top of the snapshot when it
+    is loaded. Every full save (and every COMPACT_EVERY records) writes a new
+    snapshot and empties the journal. Replaying a record twice is harmless,
+    so a crash between the two steps loses nothing.
+    """
+
+    def __init__(self, filename, journal=False):
+        super().__init__(filename)
+        self.journal_file = filename + '.journal' if journal else None
+        self.journal_records = 0
+        self.journal_torn = False
+        self.by_id = {}
+        self.by_creator = {}
+        self.guest_emails = {}
+        self.sorted_keys = {field: {} for field in SORT_FIELDS}
+        self.guest_totals = {}
+        self.rsvp_totals = {}
+        self.max_id = 0
+        self.sequence = IdSequence(filename)
+
+    def _stat(self):
+        signature = super()._stat()
+        if not self.journal_file:
+            return signature
+        try:
+            st = os.stat(self.journal_file)
+        except FileNotFoundError:
+            return signature
+        return (signature, st.st_mtime_ns, st.st_size)
+
+    def _loaded(self, data):
+        # Held as Event/Guest records; converting in place frees each dict as we go
+        for i, event in enumerate(data):
+            data[i] = Event.from_dict(event)
+        self.rebuild_indexes(data)
+        self.journal_records = 0
+        self.journal_torn = False
+        if self.journal_file:
+            for record in self._read_journal():
+                self.apply(record)
+                self.journal_records += 1
+
+    def rebuild_indexes(self, data):
+        """Recompute every index and aggregate from the event list"""
+        self.by_id = {}
+        self.by_creator = {}
+        self.guest_emails = {}
+        self.sorted_keys = {field: {} for field in SORT_FIELDS}
+        self.guest_totals = {}
+        self.rsvp_totals = {}
+        self.max_id = 0
+        for event in data:
+            self.index_event(event)
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-append
+                        self.journal_torn = True
+        except FileNotFoundError:
+            return
+
+    def apply(self, record):
+        """Apply one guest mutation record to the in-memory data"""
+        event = self.by_id.get(record['event_id'])
+        if event is None:
+            return
+        emails = self.guest_emails[event.id]
+        rsvps = self.rsvp_totals[event.id]
+        before = len(emails)
+        if record['op'] in ('add_guest', 'add_guests'):
+            for guest in record['guests'] if record['op'] == 'add_guests' else [record['guest']]:
+                if guest['email'] not in emails:
+                    guest = Guest.from_dict(guest)
+                    event.guests.append(guest)
+                    emails[guest.email] = guest
+                    rsvps[guest.status] = rsvps.get(guest.status, 0) + 1
+        elif record['op'] == 'remove_guest':
+            guest = emails.pop(record['email'], None)
+            if guest is not None:
+                event.guests = [g for g in event.guests if g.email != record['email']]
+                rsvps[guest.status] -= 1
+        elif record['op'] == 'set_guest_status':
+            guest = emails.get(record['email'])
+            if guest is not None and guest.status != record['status']:
+                rsvps[guest.status] -= 1
+                rsvps[record['status']] = rsvps.get(record['status'], 0) + 1
+                guest.status = record['status']
+        self.guest_totals[event.creator] += len(emails) - before
+
+    def commit(self, record):
+        """Persist a mutation already applied in memory
+
+        Appends record to the journal when journaling is on, otherwise
+        rewrites the whole file.
+        """
+        with self.lock, self.file_lock:
+            if not self.journal_file or self.journal_torn:
+                # Appending after a torn line would corrupt this record too
+                return self.save(self._data)
+            try:
+                with open(self.journal_file, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception:
+                self.invalidate()
+                return False
+            self._signature = self._stat()
+            self.journal_records += 1
+            if self.journal_records >= COMPACT_EVERY:
+                self.compact()
+            return True
+
+    def save(self, data):
+        with self.lock, self.file_lock:
+            if not super().save(data):
+                return False
+            if self.journal_file:
+                try:
+                    os.remove(self.journal_file)
+                except FileNotFoundError:
+                    pass
+                self.journal_records = 0
+                self.journal_torn = False
+                self._signature = self._stat()
+            return True
+
+    def compact(self):
+        """Write the current state as a new snapshot and empty the journal"""
+        with self.transaction() as data:
+            return self.save(data)
+
+    def renumber_duplicates(self):
+        """Rewrite the file with unique event ids if it has duplicates; return the (old, new) pairs"""
+        with self.transaction() as data:
+            if len(self.by_id) == len(data):
+                return []
+            changed = renumber_duplicates(data, self.sequence.current())
+            self.sequence.advance(changed[-1][1])
+            self.rebuild_indexes(data)
+            self.save(data)
+            return changed
+
+    def index_event(self, event):
+        """Add an Event record to every index"""
+        self.by_id[event.id] = event
+        self.max_id = max(self.max_id, event.id)
+        # dict rather than set so ids stay in creation order
+        self.by_creator.setdefault(event.creator, {})[event.id] = None
+        # email -> Guest record, for duplicate checks and RSVP updates
+        self.guest_emails[event.id] = {g.email: g for g in event.guests}
+        rsvps = self.rsvp_totals[event.id] = {}
+        for guest in event.guests:
+            # Guests written before RSVPs existed load as Pending
+            rsvps[guest.status] = rsvps.get(guest.status, 0) + 1
+        self.guest_totals[event.creator] = (self.guest_totals.get(event.creator, 0)
+                                            + len(event.guests))
+        # Per creator, (value, id) pairs kept sorted for keyset pagination
+        for field, by_creator in self.sorted_keys.items():
+            bisect.insort(by_creator.setdefault(event.creator, []),
+                          (event.get(field) or '', event.id))
+
+    def unindex_event(self, event):
+        if self.by_id.get(event.id) is event:
+            self.guest_totals[event.creator] -= len(event.guests)
+        self.by_id.pop(event.id, None)
+        self.by_creator.get(event.creator, {}).pop(event.id, None)
+        self.guest_emails.pop(event.id, None)
+        self.rsvp_totals.pop(event.id, None)
+        for field, by_creator in self.sorted_keys.items():
+            keys = by_creator.get(event.creator, [])
+            key = (event.get(field) or '', event.id)
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(filename, factory=JSONRepository):
+    """Return the process-wide repository for filename"""
+    key = os.path.abspath(filename)
+    with _repositories_lock:
+        if key not in _repositories:
+            _repositories[key] = factory(filename)
+        return _repositories[key]
+
+
+def _copy_event(event):
+    # Callers get plain dicts they may modify; the cached records stay intact
+    return event.to_dict()
+
+
+class JSONStorage:
+    """Storage on users.json/events.json with the same interface as SQLiteStorage"""
+
+    def __init__(self, users_file=USERS_FILE, events_file=EVENTS_FILE, journal=None):
+        self.journal = JOURNAL_ENABLED if journal is None else journal
+        self.users = get_repository(users_file, UserRepository)
+        self.events = get_repository(events_file, self._event_repository)
+        for repo in (self.users, self.events):
+            repo.ensure_exists()
+        for old_id, new_id in self.events.renumber_duplicates():
+            print(f"Duplicate event id {old_id} in {events_file} renumbered to {new_id}")
+
+    def _event_repository(self, filename):
+        return EventRepository(filename, journal=self.journal)
+
+    def close(self):
+        pass
+
+    def cache_stats(self):
+        """Return hit/miss counters for both data files"""
+        return {'users': self.users.stats(), 'events': self.events.stats()}
+
+    # Users
+
+    def get_user(self, username):
+        """Return the user dict for username, or None"""
+        with self.users.lock:
+            self.users.load()
+            user = self.users.by_username.get(username)
+            return dict(user) if user else None
+
+    def create_user(self, username, password, email):
+        """Insert a new user; return None if the username or email is taken"""
+        with self.users.transaction() as users:
+            if username in self.users.by_username or email in self.users.emails:
+                return None
+            new_user = {'username': username, 'password': password, 'email': email}
+            users.append(new_user)
+            self.users.by_username[username] = new_user
+            self.users.emails.add(email)
+            if not self.users.save(users):
+                return None
+        return dict(new_user)
+
+    def update_password(self, username, password):
+        """Replace a user's stored password (hash); return True if the user exists"""
+        with self.users.transaction() as users:
+            user = self.users.by_username.get(username)
+            if user is None:
+                return False
+            user['password'] = password
+            return self.users.save(users)
+
+    # Events
+
+    def _shard(self, creator):
+        """Return the repository holding creator's events"""
+        return self.events
+
+    def _shard_of(self, event_id):
+        """Return the repository holding event_id, or None if there is no such event"""
+        return self.events
+
+    def _next_id(self, repo, creator):
+        """Allocate an id for a new event of creator; callers hold repo's transaction"""
+        # max_id covers files written before the sequence existed
+        return repo.sequence.next(repo.max_id)
+
+    def list_events(self, creator):
+        """Return all events created by creator, oldest first"""
+        repo = self._shard(creator)
+        with repo.lock:
+            repo.load()
+            by_id = repo.by_id
+            return [_copy_event(by_id[i]) for i in repo.by_creator.get(creator, ())]
+
+    def count_events(self, creator):
+        """Return how many events creator has"""
+        repo = self._shard(creator)
+        with repo.lock:
+            repo.load()
+            return len(repo.by_creator.get(creator, ()))
+
+    def dashboard_stats(self, creator):
+        """Return the maintained totals and recent events for creator's dashboard
+
+        Recent events carry a guest_count instead of their guest list.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        repo = self._shard(creator)
+        with repo.lock:
+            repo.load()
+            ids = repo.by_creator.get(creator, {})
+            dates = repo.sorted_keys['date'].get(creator, [])
+            recent = []
+            for event_id in reversed(ids):
+                if len(recent) == RECENT_EVENTS:
+                    break
+                event = repo.by_id[event_id]
+                recent.append(dict(event, guests=[], guest_count=len(event.guests)))
+            return {
+                'total_events': len(ids),
+                'upcoming_events': len(dates) - bisect.bisect_left(dates, (today,)),
+                'total_guests': repo.guest_totals.get(creator, 0),
+                'recent_events': recent[::-1],
+            }
+
+    def check_stats(self, repair=True):
+        """Compare the maintained aggregates with the raw event list
+
+        Returns the creators whose aggregates were wrong; with repair=True
+        every index is rebuilt from the data.
+        """
+        return self._check_repository(self.events, repair)
+
+    def _check_repository(self, repo, repair):
+        with repo.lock:
+            data = repo.load()
+            guests = {}
+            counts = {}
+            stale = set()
+            for event in data:
+                guests[event.creator] = guests.get(event.creator, 0) + len(event.guests)
+                counts[event.creator] = counts.get(event.creator, 0) + 1
+                rsvps = {}
+                for guest in event.guests:
+                    rsvps[guest.status] = rsvps.get(guest.status, 0) + 1
+                maintained = repo.rsvp_totals.get(event.id, {})
+                if rsvps != {status: n for status, n in maintained.items() if n}:
+                    stale.add(event.creator)
+            creators = set(counts) | set(repo.by_creator)
+            stale = sorted(stale | {
+                creator for creator in creators
+                if guests.get(creator, 0) != repo.guest_totals.get(creator, 0)
+                or counts.get(creator, 0) != len(repo.by_creator.get(creator, ()))})
+            if stale and repair:
+                repo.rebuild_indexes(data)
+            return stale
+
+    def page_events(self, creator, sort='date', descending=False, date_from=None,
+                    date_to=None, location=None, cursor=None, limit=20, include_guests=True):
+        """Return (events, next_cursor) for one page of creator's events
+
+        Walks the creator's sorted (value, id) keys from the cursor, so a page
+        costs the same however many events the user has. Every event carries
+        guest_count; with include_guests=False its guest list is left empty.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort}")
+        after = decode_cursor(cursor) if cursor else None
+        location = location.lower() if location else None
+        repo = self._shard(creator)
+        with repo.lock:
+            repo.load()
+            keys = repo.sorted_keys[sort].get(creator, [])
+            if descending:
+                end = bisect.bisect_left(keys, after) if after else len(keys)
+                if sort == 'date' and date_to:
+                    end = min(end, bisect.bisect_right(keys, (date_to, float('inf'))))
+                positions = range(end - 1, -1, -1)
+            else:
+                start = bisect.bisect_right(keys, after) if after else 0
+                if sort == 'date' and date_from:
+                    start = max(start, bisect.bisect_left(keys, (date_from,)))
+                positions = range(start, len(keys))
+
+            page = []
+            for i in positions:
+                value, event_id = keys[i]
+                event = repo.by_id[event_id]
+                if sort == 'date' and (date_to if not descending else date_from):
+                    # Sorted by date: once past the range nothing later can match
+                    if (not descending and value > date_to) or (descending and value < date_from):
+                        break
+                if date_from and event.date < date_from:
+                    continue
+                if date_to and event.date > date_to:
+                    continue
+                if location and event.location.lower() != location:
+                    continue
+                page.append((value, event))
+                if len(page) > limit:
+                    break
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_cursor(page[-1][0], page[-1][1]['id'])
+            events = []
+            for _, event in page:
+                copy = _copy_event(event) if include_guests else dict(event, guests=[])
+                copy['guest_count'] = len(event.guests)
+                events.append(copy)
+            return events, next_cursor
+
+    def get_event(self, event_id, include_guests=True):
+        """Return the event with its guests (or an empty guest list), or None"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.lock:
+            repo.load()
+            event = repo.by_id.get(event_id)
+            if event is None:
+                return None
+            if not include_guests:
+                return dict(event, guests=[])
+            return _copy_event(event)
+
+    def create_event(self, event):
+        """Insert event (a dict without id) and return it with its new id"""
+        repo = self._shard(event['creator'])
+        with repo.transaction() as events:
+            new_event = dict(event, id=self._next_id(repo, event['creator']),
+                             guests=list(event.get('guests', [])))
+            new_event.setdefault('created_at', datetime.now().isoformat())
+            new_event = Event.from_dict(new_event)
+            events.append(new_event)
+            repo.index_event(new_event)
+            if not repo.save(events):
+                return None
+        return _copy_event(new_event)
+
+    def delete_event(self, event_id):
+        """Delete an event and its guests; return True if it existed"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return False
+        with repo.transaction() as events:
+            event = repo.by_id.get(event_id)
+            if event is None:
+                return False
+            repo.unindex_event(event)
+            return repo.save([e for e in events if e.id != event_id])
+
+    # Guests
+
+    def add_guest(self, event_id, name, email):
+        """Add a guest; return the guest dict, or None if the email is already invited"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.transaction():
+            emails = repo.guest_emails.get(event_id)
+            if emails is None or email in emails:
+                return None
+            guest = {'name': name, 'email': email,
+                     'invited_at': datetime.now().isoformat(), 'status': 'Pending'}
+            record = {'op': 'add_guest', 'event_id': event_id, 'guest': guest}
+            repo.apply(record)
+            if not repo.commit(record):
+                return None
+        return dict(guest)
+
+    def add_guests(self, event_id, guests):
+        """Add many guests in one write, skipping emails already invited
+
+        Returns the list of added guest dicts, or None if the event does not exist.
+        """
+        invited_at = datetime.now().isoformat()
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.transaction():
+            emails = repo.guest_emails.get(event_id)
+            if emails is None:
+                return None
+            added = []
+            batch_emails = set()
+            for guest in guests:
+                if guest['email'] in emails or guest['email'] in batch_emails:
+                    continue
+                batch_emails.add(guest['email'])
+                added.append({'name': guest['name'], 'email': guest['email'],
+                              'invited_at': invited_at, 'status': 'Pending'})
+            if not added:
+                return added
+            record = {'op': 'add_guests', 'event_id': event_id, 'guests': added}
+            repo.apply(record)
+            if not repo.commit(record):
+                return None
+        return [dict(g) for g in added]
+
+    def remove_guest(self, event_id, email):
+        """Remove a guest by email; return True if one was removed"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return False
+        with repo.transaction():
+            emails = repo.guest_emails.get(event_id)
+            if emails is None or email not in emails:
+                return False
+            record = {'op': 'remove_guest', 'event_id': event_id, 'email': email}
+            repo.apply(record)
+            return repo.commit(record)
+
+    def get_guest(self, event_id, email):
+        """Return one guest of an event, or None"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.lock:
+            repo.load()
+            guest = repo.guest_emails.get(event_id, {}).get(email)
+            return guest.to_dict() if guest else None
+
+    def set_guest_status(self, event_id, email, status):
+        """Record a guest's RSVP; return the previous status, or None if there is no such guest
+
+        Answering the same way twice writes nothing, so retried requests are harmless.
+        """
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.transaction():
+            guest = repo.guest_emails.get(event_id, {}).get(email)
+            if guest is None:
+                return None
+            previous = guest.status
+            if previous == status:
+                return previous
+            record = {'op': 'set_guest_status', 'event_id': event_id, 'email': email,
+                      'status': status}
+            repo.apply(record)
+            if not repo.commit(record):
+                return None
+        return previous
+
+    def rsvp_counts(self, event_id):
+        """Return {status: guests} for every RSVP status, or None if there is no such event"""
+        repo = self._shard_of(event_id)
+        if repo is None:
+            return None
+        with repo.lock:
+            repo.load()
+            rsvps = repo.rsvp_totals.get(event_id)
+            if rsvps is None:
+                return None
+            return {status: rsvps.get(status, 0) for status in RSVP_STATUSES}
+
+    # Migration
+
+    def import_json(self, users_file, events_file):
+        """The JSON files are already the live data; nothing to import"""
+        return False
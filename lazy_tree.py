@@ -0,0 +1,240 @@
+import tkinter as tk
+from tkinter import ttk
+
+# Rows inserted beyond the visible area, so short scrolls never wait on a fetch
+BUFFER_ROWS = 50
+# Fetch the next page once the view shows this fraction of the loaded rows
+PREFETCH_AT = 0.9
+# Pause after the last keystroke before a search runs
+SEARCH_DELAY_MS = 150
+# Pages a search reads per fetch before handing back what it has found
+SCAN_PAGES = 10
+# Row offering to read on when a search stopped at SCAN_PAGES
+MORE_IID = '__more__'
+
+
+def _matches(values, search):
+    return any(search in str(value).lower() for value in values)
+
+
+class ListSource:
+    """Row source over an in-memory list of (iid, values) rows
+
+    Typing more characters onto the previous search term only rescans the
+    rows that already matched, so each keystroke gets cheaper.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._search = ''
+        self._found = rows
+
+    def _filter(self, search):
+        if search != self._search:
+            if not search:
+                self._found = self.rows
+            else:
+                narrowing = self._search and search.startswith(self._search)
+                base = self._found if narrowing else self.rows
+                self._found = [row for row in base if _matches(row[1], search)]
+            self._search = search
+        return self._found
+
+    def __call__(self, cursor, limit, search=''):
+        rows = self._filter(search.lower())
+        start = cursor or 0
+        end = start + limit
+        return rows[start:end], end if end < len(rows) else None
+
+    def append(self, iid, values, search=''):
+        """Add a row at the end; return True if it matches search"""
+        row = (iid, values)
+        self.rows.append(row)
+        if self._found is not self.rows and _matches(values, self._search):
+            self._found.append(row)
+        return _matches(values, search.lower())
+
+    def remove(self, iid):
+        """Drop a row; return its position among the current matches, or None"""
+        position = None
+        for i, row in enumerate(self._found):
+            if row[0] == iid:
+                del self._found[i]
+                position = i
+                break
+        if self._found is not self.rows:
+            for i, row in enumerate(self.rows):
+                if row[0] == iid:
+                    del self.rows[i]
+                    break
+        return position
+
+
+class PagedSource:
+    """Row source over a cursor-paged query such as storage.page_events
+
+    fetch_page(cursor, limit) returns (records, next_cursor) and to_row turns
+    a record into an (iid, values) row. A search filters each page as it
+    arrives, reading on until a page's worth of matches is found or
+    SCAN_PAGES pages have been read, so a rare term returns a short page
+    with a cursor instead of reading the whole list.
+    """
+
+    def __init__(self, fetch_page, to_row):
+        self.fetch_page = fetch_page
+        self.to_row = to_row
+
+    def __call__(self, cursor, limit, search=''):
+        search = search.lower()
+        rows = []
+        for _ in range(SCAN_PAGES):
+            records, cursor = self.fetch_page(cursor, limit)
+            for record in records:
+                row = self.to_row(record)
+                if not search or _matches(row[1], search):
+                    rows.append(row)
+            if len(rows) >= limit or cursor is None:
+                break
+        return rows, cursor
+
+    def append(self, iid, values, search=''):
+        """Rows live in the query; report whether a new one matches search"""
+        return _matches(values, search.lower())
+
+    def remove(self, iid):
+        """Keyset cursors are unaffected by a removed row"""
+        return None
+
+
+class LazyTreeview(ttk.Frame):
+    """Treeview that inserts rows a page at a time as the user scrolls
+
+    source(cursor, limit, search) returns (rows, next_cursor), where rows are
+    (iid, values) pairs and next_cursor is None once every row is loaded.
+    Only a screenful plus BUFFER_ROWS are inserted up front, so opening a
+    list of any size costs the same.
+
+    With a TaskRunner, source is called on a worker thread and the rows are
+    inserted when it returns, so a slow query never blocks the UI. A page
+    that comes back short with more to read (a search that hit SCAN_PAGES)
+    ends in a "Load more..." row; selecting it reads on.
+    """
+
+    def __init__(self, parent, columns, source, height=15, column_width=120, search=True,
+                 runner=None):
+        super().__init__(parent)
+        self.source = source
+        self.runner = runner
+        self.page_size = height + BUFFER_ROWS
+        self.search_var = tk.StringVar()
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        # Bumped by reload() so pages fetched for an older search are dropped
+        self._generation = 0
+        self._search_job = None
+
+        if search:
+            search_frame = ttk.Frame(self)
+            search_frame.pack(fill=tk.X, pady=(0, 5))
+            ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+            ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=10)
+            self.search_var.trace_add('write', self._schedule_search)
+
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=height)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=column_width)
+
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.reload()
+
+    def _on_scroll(self, first, last):
+        """Track the scrollbar and prefetch when the view nears the last row"""
+        self.scrollbar.set(first, last)
+        if (float(last) >= PREFETCH_AT and not self._exhausted and not self._loading
+                and not self.tree.exists(MORE_IID)):
+            self._loading = True
+            self.after_idle(self.load_more)
+
+    def _on_select(self, event):
+        if MORE_IID in self.tree.selection():
+            self.tree.selection_remove(MORE_IID)
+            if not self._loading:
+                self.load_more()
+
+    def load_more(self):
+        """Fetch the next page of rows and insert it"""
+        if self._exhausted:
+            self._loading = False
+            return
+        self._loading = True
+        generation = self._generation
+        cursor, search = self._cursor, self.search_var.get().strip()
+
+        def loaded(result):
+            if generation == self._generation:
+                self._insert_page(*result)
+
+        def failed(error):
+            if generation == self._generation:
+                self._loading = False
+            raise error
+
+        if self.runner is None:
+            loaded(self.source(cursor, self.page_size, search))
+        else:
+            self.runner.submit(lambda task: self.source(cursor, self.page_size, search),
+                               on_done=loaded, on_error=failed)
+
+    def _insert_page(self, rows, cursor):
+        self._loading = False
+        if self.tree.exists(MORE_IID):
+            self.tree.delete(MORE_IID)
+        for iid, values in rows:
+            self.tree.insert('', tk.END, iid=iid, values=values)
+        self._cursor = cursor
+        self._exhausted = cursor is None
+        if not self._exhausted and len(rows) < self.page_size:
+            self.tree.insert('', tk.END, iid=MORE_IID, values=("Load more...",))
+
+    def add_row(self, iid, values):
+        """Add a row at the end; it is inserted now only if every row is loaded"""
+        if self.source.append(iid, values, self.search_var.get().strip()) and self._exhausted:
+            self.tree.insert('', tk.END, iid=iid, values=values)
+
+    def remove_row(self, iid):
+        """Remove a row from the source and, if it is loaded, from the tree"""
+        position = self.source.remove(iid)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+        # Offsets past the removed row shift down by one
+        if position is not None and self._cursor is not None and position < self._cursor:
+            self._cursor -= 1
+
+    def reload(self):
+        """Drop the loaded rows and start again from the first page"""
+        self._generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self._cursor = None
+        self._exhausted = False
+        self._loading = False
+        self.load_more()
+
+    def _schedule_search(self, *args):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        self.reload()
@@ -0,0 +1,185 @@
+import bisect
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Timing spans, request histograms and /metrics; off unless set to 1
+METRICS_ENABLED = os.environ.get('EVENT_PLANNER_METRICS') == '1'
+# cProfile requests carrying an X-Profile header ('header'), every request
+# ('all'), or none (unset)
+PROFILE_MODE = os.environ.get('EVENT_PLANNER_PROFILE', '')
+PROFILE_DIR = os.environ.get('EVENT_PLANNER_PROFILE_DIR', 'profiles')
+
+# Upper bounds in seconds; fine at the low end where storage calls land
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style histogram with one set of buckets per label value tuple"""
+
+    def __init__(self, name, help_text, labels, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket counts (plus +Inf), then sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            labels = ','.join(f'{name}="{_escape(value)}"'
+                              for name, value in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram('event_planner_request_duration_seconds',
+                            'Time spent handling HTTP requests',
+                            ('method', 'endpoint', 'status'))
+SPAN_SECONDS = Histogram('event_planner_span_duration_seconds',
+                         'Time spent in storage calls, template rendering and email sends',
+                         ('span',))
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - start, name)
+
+
+def span(name):
+    """Time a block into the span histogram; a shared no-op when metrics are off"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _timed(name)
+
+
+class InstrumentedStorage:
+    """Proxy timing every public method call of a storage-like object"""
+
+    def __init__(self, target, prefix):
+        self._target = target
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        span_name = f'{self._prefix}.{name}'
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                SPAN_SECONDS.observe(time.perf_counter() - start, span_name)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, timed)
+        return timed
+
+
+def instrument(target, prefix):
+    """Return target wrapped for timing, or target itself when metrics are off"""
+    return InstrumentedStorage(target, prefix) if METRICS_ENABLED else target
+
+
+def observe_request(method, endpoint, status, seconds):
+    REQUEST_SECONDS.observe(seconds, method, endpoint or 'unmatched', status)
+
+
+def render_metrics():
+    return '\n'.join([REQUEST_SECONDS.render(), SPAN_SECONDS.render()]) + '\n'
+
+
+def instrument_templates(app):
+    """Time each render_template call through Flask's template signals"""
+    from flask import before_render_template, template_rendered
+    local = threading.local()
+
+    def started(sender, template, context, **extra):
+        local.__dict__.setdefault('starts', []).append(time.perf_counter())
+
+    def finished(sender, template, context, **extra):
+        starts = getattr(local, 'starts', None)
+        if starts:
+            SPAN_SECONDS.observe(time.perf_counter() - starts.pop(), f'template.{template.name}')
+
+    before_render_template.connect(started, app, weak=False)
+    template_rendered.connect(finished, app, weak=False)
+
+
+class RequestProfiler:
+    """Opt-in cProfile of single requests, written to PROFILE_DIR as .prof files
+
+    Only one request is profiled at a time; others run unprofiled rather
+    than wait.
+    """
+
+    def __init__(self, mode=PROFILE_MODE, directory=PROFILE_DIR):
+        self.mode = mode
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def start(self, headers):
+        """Return a running profiler if this request should be profiled, else None"""
+        if not self.mode:
+            return None
+        if self.mode != 'all' and not headers.get('X-Profile'):
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler, endpoint):
+        """Stop profiler and return the path its stats were written to"""
+        profiler.disable()
+        self._lock.release()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(self.directory, f'{stamp}-{endpoint or "unmatched"}.prof')
+        profiler.dump_stats(path)
+        return path
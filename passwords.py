@@ -0,0 +1,57 @@
+import base64
+import hashlib
+import hmac
+import os
+
+# log2 of the scrypt work factor N; each step doubles hashing time and memory
+PASSWORD_HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, cost):
+    n = 1 << cost
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=SCRYPT_R, p=SCRYPT_P,
+                          maxmem=256 * n * SCRYPT_R, dklen=32)
+
+
+def hash_password(password, cost=None):
+    """Return a salted scrypt hash string: scrypt$<cost>$<salt>$<hash>"""
+    cost = PASSWORD_HASH_COST if cost is None else cost
+    salt = os.urandom(SALT_BYTES)
+    return f"scrypt${cost}${_b64(salt)}${_b64(_scrypt(password, salt, cost))}"
+
+
+def _parse(stored):
+    parts = stored.split('$')
+    if len(parts) != 4 or parts[0] != 'scrypt':
+        return None
+    try:
+        return int(parts[1]), _unb64(parts[2]), _unb64(parts[3])
+    except ValueError:
+        return None
+
+
+def verify_password(stored, password):
+    """Check password against a stored hash (or a legacy plaintext password)"""
+    parsed = _parse(stored)
+    if parsed is None:
+        # Accounts created before hashing; replaced by needs_rehash on login
+        return hmac.compare_digest(stored.encode(), password.encode())
+    cost, salt, expected = parsed
+    return hmac.compare_digest(_scrypt(password, salt, cost), expected)
+
+
+def needs_rehash(stored):
+    """True for plaintext passwords and hashes made with a lower cost than today's"""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] < PASSWORD_HASH_COST
@@ -0,0 +1,189 @@
+"""Compact in-memory event and guest records
+
+Event and Guest hold the same data as the event and guest dicts passed
+around the app, in __slots__ objects instead: no per-object key table,
+repeated strings (RSVP status, creator, location, date) interned so equal
+values share one object, and timestamps kept as integer microseconds
+instead of ISO strings. Long-lived collections, such as the JSON backend's
+cache and the Tk guest list, use them; storage methods still return dicts.
+
+Records support the read side of the dict interface (record['name'],
+get, keys, dict(record)) plus item assignment, so code written against
+dicts works unchanged. to_dict() returns plain data again.
+"""
+import sys
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def pack_time(value):
+    """Return an ISO timestamp as microseconds since 1970, or value itself if that would lose anything"""
+    if type(value) is not str:
+        return value
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.tzinfo is not None:
+        return value
+    # Only the layout isoformat() writes comes back byte for byte; e.g.
+    # '...T12:00:00.000000' would return as '...T12:00:00', so keep the string
+    if value[10:11] != 'T' or len(value) != (26 if moment.microsecond else 19):
+        return value
+    if moment.microsecond and value[19] != '.':
+        return value
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def unpack_time(value):
+    """Inverse of pack_time"""
+    if type(value) is int:
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+
+def _interned(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _interned_field(slot):
+    def get(self):
+        return getattr(self, slot)
+
+    def set(self, value):
+        setattr(self, slot, _interned(value))
+    return property(get, set)
+
+
+def _time_field(slot):
+    def get(self):
+        return unpack_time(getattr(self, slot))
+
+    def set(self, value):
+        setattr(self, slot, pack_time(value))
+    return property(get, set)
+
+
+class Record:
+    """Base for slotted records readable like dicts
+
+    Keys outside FIELDS (from newer or hand-edited files) are kept in a
+    side dict so nothing is lost on the way back to disk.
+    """
+    __slots__ = ('_extra',)
+    FIELDS = ()
+
+    def __init__(self, **values):
+        self._extra = None
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if key in self]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Record) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Guest(Record):
+    """One invited guest; status defaults to Pending"""
+    __slots__ = ('name', 'email', '_invited_at', '_status')
+    FIELDS = ('name', 'email', 'invited_at', 'status')
+
+    invited_at = _time_field('_invited_at')
+    status = _interned_field('_status')
+
+    # Loads build one of these per guest, so skip the generic per-key path
+    def __init__(self, name=None, email=None, invited_at=None, status='Pending', **extra):
+        self.name = name
+        self.email = email
+        self._invited_at = pack_time(invited_at)
+        self._status = _interned(status)
+        self._extra = extra or None
+
+    def to_dict(self):
+        data = {'name': self.name, 'email': self.email,
+                'invited_at': unpack_time(self._invited_at), 'status': self._status}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+
+class Event(Record):
+    """One event; guests is a list of Guest records"""
+    __slots__ = ('id', 'name', '_date', '_location', 'description', '_creator', 'password',
+                 '_created_at', 'guests')
+    FIELDS = ('id', 'name', 'date', 'location', 'description', 'creator', 'password',
+              'created_at', 'guests')
+
+    date = _interned_field('_date')
+    location = _interned_field('_location')
+    creator = _interned_field('_creator')
+    created_at = _time_field('_created_at')
+
+    def __init__(self, **values):
+        guests = values.pop('guests', ())
+        super().__init__(**values)
+        self.guests = [g if isinstance(g, Guest) else Guest.from_dict(g) for g in guests]
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['guests'] = [guest.to_dict() for guest in self.guests]
+        return data
+
+
+def to_data(value):
+    """json/msgpack `default` hook: records serialise as their dicts"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
@@ -0,0 +1,143 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from storage import DB_FILE
+
+# Idle sessions expire after this many seconds
+SESSION_TTL = 7 * 24 * 3600
+# 'sqlite' (shared by every worker process) or 'memory' (this process only)
+SESSION_BACKEND = os.environ.get('EVENT_PLANNER_SESSIONS', 'sqlite')
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+class MemorySessionStore:
+    """In-process LRU session store with sliding expiry"""
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, data):
+        """Store data under a new session id and return the id"""
+        sid = new_session_id()
+        with self._lock:
+            self._sessions[sid] = (data, time.time() + self.ttl)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+        return sid
+
+    def get(self, sid):
+        """Return the session's data, or None if it is unknown or expired"""
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            now = time.time()
+            if expires_at < now:
+                del self._sessions[sid]
+                return None
+            self._sessions[sid] = (data, now + self.ttl)
+            self._sessions.move_to_end(sid)
+            return data
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def delete_user(self, username):
+        """End every session belonging to username"""
+        with self._lock:
+            for sid in [sid for sid, (data, _) in self._sessions.items()
+                        if data.get('username') == username]:
+                del self._sessions[sid]
+
+
+class SQLiteSessionStore:
+    """Session store in SQLite, shared by every worker using the same database
+
+    Expiry slides forward on access, but the row is only rewritten once less
+    than half the TTL remains, so most requests are a single primary-key read.
+    """
+
+    def __init__(self, db_file=DB_FILE, ttl=SESSION_TTL):
+        self.db_file = db_file
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'id TEXT PRIMARY KEY, username TEXT NOT NULL, '
+                'data TEXT NOT NULL, expires_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)')
+            # create() purges expired rows; without this each login scans the table
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def create(self, data):
+        """Store data under a new session id and return the id"""
+        sid = new_session_id()
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM sessions WHERE expires_at < ?', (now,))
+            conn.execute('INSERT INTO sessions (id, username, data, expires_at) VALUES (?, ?, ?, ?)',
+                         (sid, data.get('username', ''), json.dumps(data), now + self.ttl))
+        return sid
+
+    def get(self, sid):
+        """Return the session's data, or None if it is unknown or expired"""
+        conn = self._connect()
+        row = conn.execute('SELECT data, expires_at FROM sessions WHERE id = ?',
+                           (sid,)).fetchone()
+        if row is None:
+            return None
+        data, expires_at = row
+        now = time.time()
+        if expires_at < now:
+            self.delete(sid)
+            return None
+        if expires_at - now < self.ttl / 2:
+            with conn:
+                conn.execute('UPDATE sessions SET expires_at = ? WHERE id = ?',
+                             (now + self.ttl, sid))
+        return json.loads(data)
+
+    def delete(self, sid):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+    def delete_user(self, username):
+        """End every session belonging to username"""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM sessions WHERE username = ?', (username,))
+
+
+def open_session_store(db_file=DB_FILE, backend=None):
+    """Open the session store selected by EVENT_PLANNER_SESSIONS"""
+    backend = backend or SESSION_BACKEND
+    if backend == 'memory':
+        return MemorySessionStore()
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown session backend: {backend}")
+    return SQLiteSessionStore(db_file)
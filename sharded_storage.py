@@ -0,0 +1,321 @@
+"""Events split across per-creator shard files
+
+With EVENT_PLANNER_STORAGE=sharded, events live in SHARD_DIR as several
+events-<key>.json files instead of one events.json. A user's events all sit
+in one shard, picked by a hash of the username (or one file per user with
+EVENT_PLANNER_SHARDS=creator), so a write rewrites and locks only that
+shard. users.json is shared as before.
+
+A small SQLite directory in the same folder maps event ids to creators, so
+requests that only carry an event id (guests, RSVPs) open a single shard,
+and allocates ids so they stay unique across shards. The shard count is
+fixed when the folder is created; change it with the reshard tool while the
+app is stopped:
+
+    python sharded_storage.py --shards 64
+    python sharded_storage.py --shards creator --import events.json [--force]
+    python sharded_storage.py --export events.json
+"""
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+
+from file_lock import atomic_write
+from json_storage import (EVENTS_FILE, JOURNAL_ENABLED, USERS_FILE, EventRepository, IdSequence,
+                          JSONStorage, UserRepository, get_repository, renumber_duplicates)
+from storage import StorageError
+
+# Folder holding the shard files and the event directory
+SHARD_DIR = os.environ.get('EVENT_PLANNER_SHARD_DIR', 'events.d')
+# Hash buckets for a new folder, or 'creator' for one file per user
+SHARDS = os.environ.get('EVENT_PLANNER_SHARDS', '16')
+DIRECTORY_DB = 'directory.db'
+
+
+def parse_shards(value):
+    """Return 'creator' or a positive number of hash buckets"""
+    if value == 'creator':
+        return value
+    count = int(value)
+    if count < 1:
+        raise ValueError(f"Shard count must be at least 1, not {count}")
+    return count
+
+
+def shard_key(creator, shards):
+    """Return the name of the shard holding creator's events"""
+    # hash() is salted per process; every worker must agree on the shard
+    digest = hashlib.sha1(creator.encode()).hexdigest()
+    if shards == 'creator':
+        return digest[:20]
+    return f'{int(digest[:8], 16) % shards:04d}'
+
+
+class EventDirectory:
+    """Event id -> creator map and shard layout, in SQLite
+
+    Ids come from an AUTOINCREMENT column, so they are never reused and
+    never collide between shards. An event's creator never changes, so
+    lookups are cached for the life of the process.
+    """
+
+    def __init__(self, db_file, shards=None):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._creators = {}
+        conn = self._connect()
+        # Several workers allocate ids here; WAL keeps lookups from waiting on them
+        conn.execute('PRAGMA journal_mode = WAL')
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS event_shards ('
+                         'id INTEGER PRIMARY KEY AUTOINCREMENT, creator TEXT NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS shard_layout ('
+                         'key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO shard_layout (key, value) VALUES ('shards', ?)",
+                         (str(shards or SHARDS),))
+        row = conn.execute("SELECT value FROM shard_layout WHERE key = 'shards'").fetchone()
+        self.shards = parse_shards(row[0])
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def creator(self, event_id):
+        """Return the creator of event_id, or None if it is not known"""
+        creator = self._creators.get(event_id)
+        if creator is None:
+            row = self._connect().execute('SELECT creator FROM event_shards WHERE id = ?',
+                                          (event_id,)).fetchone()
+            if row is None:
+                return None
+            creator = self._creators[event_id] = row[0]
+        return creator
+
+    def add(self, creator):
+        """Allocate an id for a new event of creator"""
+        conn = self._connect()
+        with conn:
+            event_id = conn.execute('INSERT INTO event_shards (creator) VALUES (?)',
+                                    (creator,)).lastrowid
+        self._creators[event_id] = creator
+        return event_id
+
+    def remove(self, event_id):
+        self._creators.pop(event_id, None)
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM event_shards WHERE id = ?', (event_id,))
+
+    def reserve(self, last_id):
+        """Make sure later ids start above last_id"""
+        conn = self._connect()
+        with conn:
+            # MAX() in one statement, so an id allocated meanwhile is never handed out again
+            if not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) "
+                                "WHERE name = 'event_shards'", (last_id,)).rowcount:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('event_shards', ?)",
+                             (last_id,))
+
+    def last_id(self):
+        """Return the highest id ever allocated, deleted events included"""
+        row = self._connect().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'event_shards'").fetchone()
+        return row[0] if row else 0
+
+    def fill(self, events, last_id=0):
+        """Record (id, creator) pairs in bulk; later ids start above last_id"""
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT INTO event_shards (id, creator) VALUES (?, ?)', events)
+            seq = max([last_id] + [event_id for event_id, _ in events])
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'event_shards'")
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('event_shards', ?)",
+                         (seq,))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class ShardedJSONStorage(JSONStorage):
+    """JSONStorage with each user's events in their own shard file
+
+    Methods taking a creator open only that creator's shard; methods taking
+    an event id find the shard through the directory first.
+
+    Opening an empty shard folder beside an events.json that still holds
+    events raises StorageError instead of starting without them; import
+    them with --import first. Ids continue above events.json.seq either way,
+    since tokens and jobs for those ids may still exist.
+    """
+
+    def __init__(self, users_file=USERS_FILE, shard_dir=SHARD_DIR, journal=None,
+                 events_file=EVENTS_FILE):
+        self.journal = JOURNAL_ENABLED if journal is None else journal
+        self.users = get_repository(users_file, UserRepository)
+        self.users.ensure_exists()
+        self.shard_dir = shard_dir
+        if not shard_files(shard_dir) and os.path.exists(events_file) and read_events(events_file):
+            raise StorageError(f"{events_file} holds events that are not in {shard_dir}; run "
+                               f"python sharded_storage.py --import {events_file} first")
+        os.makedirs(shard_dir, exist_ok=True)
+        self.directory = EventDirectory(os.path.join(shard_dir, DIRECTORY_DB))
+        last_id = IdSequence(events_file).current()
+        if last_id > self.directory.last_id():
+            self.directory.reserve(last_id)
+        self._shards = {}
+
+    def close(self):
+        self.directory.close()
+
+    def cache_stats(self):
+        """Return hit/miss counters for users.json and every shard opened so far"""
+        return {'users': self.users.stats(), 'shards': self.directory.shards,
+                'events': [repo.stats() for repo in list(self._shards.values())]}
+
+    def shard_file(self, creator):
+        return os.path.join(self.shard_dir,
+                            f'events-{shard_key(creator, self.directory.shards)}.json')
+
+    def _shard(self, creator):
+        filename = self.shard_file(creator)
+        repo = self._shards.get(filename)
+        if repo is None:
+            # A shard file appears on its first write; until then it reads as []
+            repo = self._shards[filename] = get_repository(filename, self._event_repository)
+        return repo
+
+    def _shard_of(self, event_id):
+        creator = self.directory.creator(event_id)
+        return self._shard(creator) if creator is not None else None
+
+    def _next_id(self, repo, creator):
+        return self.directory.add(creator)
+
+    def delete_event(self, event_id):
+        """Delete an event and its guests; return True if it existed"""
+        if not super().delete_event(event_id):
+            return False
+        self.directory.remove(event_id)
+        return True
+
+    def check_stats(self, repair=True):
+        """Check the maintained aggregates of every shard; see JSONStorage.check_stats"""
+        stale = []
+        for filename in shard_files(self.shard_dir):
+            repo = get_repository(filename, self._event_repository)
+            stale.extend(self._check_repository(repo, repair))
+        return sorted(stale)
+
+
+def shard_files(shard_dir):
+    return sorted(glob.glob(os.path.join(shard_dir, 'events-*.json')))
+
+
+def read_events(filename):
+    """Return the events in a file as dicts, with its journal replayed"""
+    repo = EventRepository(filename, journal=True)
+    return [event.to_dict() for event in repo.load()]
+
+
+def reshard(shard_dir, shards, source=None, force=False):
+    """Rewrite every event into a new layout; return (events, shard files written)
+
+    Events come from the shards already in shard_dir, or from source (a
+    single events.json) when given. Importing over shards that hold events
+    would discard them, so it raises ValueError unless force is set. Either
+    way, new ids continue above every id either side has handed out.
+    The new layout is built beside the old one and swapped in by renaming,
+    so a failure leaves the old one intact.
+    """
+    shards = parse_shards(str(shards))
+    directory_db = os.path.join(shard_dir, DIRECTORY_DB)
+    existing = [event for filename in shard_files(shard_dir) for event in read_events(filename)]
+    last_id = EventDirectory(directory_db).last_id() if os.path.exists(directory_db) else 0
+    if source:
+        if existing and not force:
+            raise ValueError(f"{shard_dir} already holds {len(existing)} events; importing "
+                             f"{source} would discard them (use --force to replace them)")
+        events = read_events(source)
+        # Ids already handed out here may still be in invitation links and tokens
+        last_id = max(last_id, IdSequence(source).current())
+        # Old files can repeat an id; the directory needs each one once
+        renumber_duplicates(events, last_id)
+    else:
+        events = existing
+
+    by_shard = {}
+    for event in sorted(events, key=lambda event: event['id']):
+        by_shard.setdefault(shard_key(event['creator'], shards), []).append(event)
+
+    building = shard_dir.rstrip(os.sep) + '.new'
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    for key, shard_events in by_shard.items():
+        if not EventRepository(os.path.join(building, f'events-{key}.json')).save(shard_events):
+            raise OSError(f"Could not write shard {key} in {building}")
+    directory = EventDirectory(os.path.join(building, DIRECTORY_DB), shards)
+    directory.fill([(event['id'], event['creator']) for event in events], last_id)
+    directory.close()
+
+    retired = shard_dir.rstrip(os.sep) + '.old'
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(shard_dir):
+        os.rename(shard_dir, retired)
+    os.rename(building, shard_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+    return len(events), len(by_shard)
+
+
+def export(shard_dir, filename):
+    """Write every event back into a single events file; return the number of events"""
+    events = [event for path in shard_files(shard_dir) for event in read_events(path)]
+    events.sort(key=lambda event: event['id'])
+    # journal=True so saving also drops any stale journal beside filename
+    if not EventRepository(filename, journal=True).save(events):
+        raise OSError(f"Could not write {filename}")
+    # Keep the ids of deleted events retired in the single-file layout too
+    last_id = EventDirectory(os.path.join(shard_dir, DIRECTORY_DB)).last_id()
+    sequence = IdSequence(filename)
+    atomic_write(sequence.filename, lambda f: f.write(str(max(last_id, sequence.current()))))
+    return len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reshard or export the sharded event files "
+                                                 "(stop the app first)")
+    parser.add_argument('--dir', default=SHARD_DIR, help='shard folder')
+    parser.add_argument('--shards', help="new number of hash buckets, or 'creator'")
+    parser.add_argument('--import', dest='source', help='take the events from this events.json')
+    parser.add_argument('--export', help='write every event into this single events file')
+    parser.add_argument('--force', action='store_true',
+                        help='let --import replace events already in the shard folder')
+    args = parser.parse_args()
+    if args.export:
+        print(f"{export(args.dir, args.export)} events written to {args.export}")
+        return
+    if not args.shards and not args.source:
+        parser.error('give --shards, --import or --export')
+    shards = args.shards
+    if not shards:
+        path = os.path.join(args.dir, DIRECTORY_DB)
+        shards = EventDirectory(path).shards if os.path.exists(path) else SHARDS
+    try:
+        events, files = reshard(args.dir, shards, args.source, args.force)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{events} events in {files} shard files under {args.dir} (shards: {shards})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,609 @@
+import sqlite3
+import threading
+import base64
+import json
+import os
+from datetime import datetime
+
+from data_codecs import load_file
+
+# Default database shared by the web app and the Tk client
+DB_FILE = "event_planner.db"
+
+# 'sqlite' (default), 'json' to keep the data in users.json/events.json, or
+# 'sharded' to split events.json into per-user shard files (sharded_storage.py)
+STORAGE_BACKEND = os.environ.get('EVENT_PLANNER_STORAGE', 'sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    location TEXT NOT NULL,
+    description TEXT,
+    password TEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+CREATE TABLE IF NOT EXISTS guests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    status TEXT DEFAULT 'Pending',
+    FOREIGN KEY (event_id) REFERENCES events (id)
+);
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_events INTEGER NOT NULL DEFAULT 0,
+    total_guests INTEGER NOT NULL DEFAULT 0,
+    recent_event_ids TEXT NOT NULL DEFAULT '[]',
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+"""
+
+# Lookup paths used by list_events, get_event and the guest mutations
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_events_user_id ON events (user_id);
+CREATE INDEX IF NOT EXISTS idx_events_user_date ON events (user_id, date, id);
+CREATE INDEX IF NOT EXISTS idx_events_user_created ON events (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_guests_event_email ON guests (event_id, email);
+"""
+
+# Columns the original schema is missing, added in place on open
+EXTRA_COLUMNS = {
+    'events': [('created_at', 'TEXT'), ('guest_count', 'INTEGER NOT NULL DEFAULT 0'),
+               ('accepted_count', 'INTEGER NOT NULL DEFAULT 0'),
+               ('declined_count', 'INTEGER NOT NULL DEFAULT 0')],
+    'guests': [('invited_at', 'TEXT')],
+}
+
+# Number of newest event ids kept per user for the dashboard
+RECENT_EVENTS = 5
+
+# Fields events can be listed by, in page_events
+SORT_FIELDS = ('date', 'created_at')
+
+# Guest statuses; answered ones are counted per event
+RSVP_STATUSES = ('Pending', 'Accepted', 'Declined')
+RSVP_COLUMNS = {'Accepted': 'accepted_count', 'Declined': 'declined_count'}
+
+EVENT_QUERY = """
+SELECT events.*, users.username AS creator
+FROM events JOIN users ON users.id = events.user_id
+"""
+
+
+class StorageError(Exception):
+    """Raised when the data files cannot be read or locked safely"""
+
+
+class SQLiteStorage:
+    """Row-level storage for users, events and guests in SQLite"""
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self._local = threading.local()
+        self.initialize()
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA foreign_keys = ON')
+            self._local.conn = conn
+        return conn
+
+    def initialize(self):
+        """Create missing tables and columns"""
+        conn = self._connect()
+        # WAL lets readers in other workers proceed while one worker writes
+        conn.execute('PRAGMA journal_mode = WAL')
+        with conn:
+            conn.executescript(SCHEMA)
+            migrated = False
+            for table, columns in EXTRA_COLUMNS.items():
+                existing = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+                for name, kind in columns:
+                    if name not in existing:
+                        conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {kind}')
+                        migrated = True
+            # Keyset pagination compares (created_at, id); NULL would never match
+            conn.execute("UPDATE events SET created_at = '' WHERE created_at IS NULL")
+            conn.executescript(INDEXES)
+            users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            stats = conn.execute('SELECT COUNT(*) FROM user_stats').fetchone()[0]
+            if migrated or users != stats:
+                self._rebuild_stats(conn)
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def cache_stats(self):
+        """SQLite manages its own page cache; there are no counters to report"""
+        return {}
+
+    # Users
+
+    def get_user(self, username):
+        """Return the user dict for username, or None"""
+        row = self._connect().execute(
+            'SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        return dict(row) if row else None
+
+    def create_user(self, username, password, email):
+        """Insert a new user; return None if the username or email is taken"""
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+                    (username, email, password))
+                conn.execute('INSERT INTO user_stats (user_id) VALUES (?)', (cursor.lastrowid,))
+        except sqlite3.IntegrityError:
+            return None
+        return {'id': cursor.lastrowid, 'username': username,
+                'email': email, 'password': password}
+
+    def update_password(self, username, password):
+        """Replace a user's stored password (hash); return True if the user exists"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute('UPDATE users SET password = ? WHERE username = ?',
+                                  (password, username))
+        return cursor.rowcount > 0
+
+    # Events
+
+    def _guests_for(self, conn, event_ids):
+        """Return {event_id: [guest, ...]} for the given events"""
+        guests = {event_id: [] for event_id in event_ids}
+        if not event_ids:
+            return guests
+        placeholders = ','.join('?' * len(event_ids))
+        rows = conn.execute(
+            f'SELECT * FROM guests WHERE event_id IN ({placeholders}) ORDER BY id',
+            list(event_ids))
+        for row in rows:
+            guests[row['event_id']].append(_guest_from_row(row))
+        return guests
+
+    def list_events(self, creator):
+        """Return all events created by creator, oldest first"""
+        conn = self._connect()
+        rows = conn.execute(EVENT_QUERY + ' WHERE users.username = ? ORDER BY events.id',
+                            (creator,)).fetchall()
+        guests = self._guests_for(conn, [row['id'] for row in rows])
+        return [_event_from_row(row, guests[row['id']]) for row in rows]
+
+    def count_events(self, creator):
+        """Return how many events creator has"""
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM events JOIN users ON users.id = events.user_id '
+            'WHERE users.username = ?', (creator,)).fetchone()[0]
+
+    def page_events(self, creator, sort='date', descending=False, date_from=None,
+                    date_to=None, location=None, cursor=None, limit=20, include_guests=True):
+        """Return (events, next_cursor) for one page of creator's events
+
+        Uses keyset pagination on (sort field, id), so a page costs the same
+        however many events the user has. next_cursor is None on the last page.
+        Every event carries guest_count; with include_guests=False its guest
+        list is left empty instead of being read.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort}")
+        clauses = ['users.username = ?']
+        params = [creator]
+        if date_from:
+            clauses.append('events.date >= ?')
+            params.append(date_from)
+        if date_to:
+            clauses.append('events.date <= ?')
+            params.append(date_to)
+        if location:
+            clauses.append('events.location = ? COLLATE NOCASE')
+            params.append(location)
+        if cursor:
+            clauses.append(f"(events.{sort}, events.id) {'<' if descending else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        direction = 'DESC' if descending else 'ASC'
+        conn = self._connect()
+        rows = conn.execute(
+            EVENT_QUERY + ' WHERE ' + ' AND '.join(clauses) +
+            f' ORDER BY events.{sort} {direction}, events.id {direction} LIMIT ?',
+            params + [limit + 1]).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort], rows[-1]['id'])
+        guests = self._guests_for(conn, [row['id'] for row in rows]) if include_guests else {}
+        events = []
+        for row in rows:
+            event = _event_from_row(row, guests.get(row['id'], []))
+            event['guest_count'] = row['guest_count']
+            events.append(event)
+        return events, next_cursor
+
+    def get_event(self, event_id, include_guests=True):
+        """Return the event with its guests (or an empty guest list), or None"""
+        conn = self._connect()
+        row = conn.execute(EVENT_QUERY + ' WHERE events.id = ?', (event_id,)).fetchone()
+        if row is None:
+            return None
+        if not include_guests:
+            return _event_from_row(row, [])
+        return _event_from_row(row, self._guests_for(conn, [row['id']])[row['id']])
+
+    def create_event(self, event):
+        """Insert event (a dict without id) and return it with its new id"""
+        conn = self._connect()
+        with conn:
+            user = conn.execute('SELECT id FROM users WHERE username = ?',
+                                (event['creator'],)).fetchone()
+            if user is None:
+                return None
+            # AUTOINCREMENT draws ids from sqlite_sequence, so deleted ids are never reused
+            cursor = conn.execute(
+                'INSERT INTO events (user_id, name, date, location, description, password, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (user['id'], event['name'], event['date'], event['location'],
+                 event.get('description', ''), event['password'],
+                 event.get('created_at') or datetime.now().isoformat()))
+            conn.execute('UPDATE user_stats SET total_events = total_events + 1 WHERE user_id = ?',
+                         (user['id'],))
+            self._refresh_recent(conn, user['id'])
+        return dict(event, id=cursor.lastrowid, guests=list(event.get('guests', [])))
+
+    def delete_event(self, event_id):
+        """Delete an event and its guests; return True if it existed"""
+        conn = self._connect()
+        with conn:
+            event = conn.execute('SELECT user_id, guest_count FROM events WHERE id = ?',
+                                 (event_id,)).fetchone()
+            if event is None:
+                return False
+            conn.execute('DELETE FROM guests WHERE event_id = ?', (event_id,))
+            conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+            conn.execute(
+                'UPDATE user_stats SET total_events = total_events - 1, '
+                'total_guests = total_guests - ? WHERE user_id = ?',
+                (event['guest_count'], event['user_id']))
+            self._refresh_recent(conn, event['user_id'])
+        return True
+
+    # Guests
+
+    def add_guest(self, event_id, name, email):
+        """Add a guest; return the guest dict, or None if the email is already invited"""
+        guest = {'name': name, 'email': email,
+                 'invited_at': datetime.now().isoformat(), 'status': 'Pending'}
+        conn = self._connect()
+        with conn:
+            exists = conn.execute('SELECT 1 FROM guests WHERE event_id = ? AND email = ?',
+                                  (event_id, email)).fetchone()
+            if exists:
+                return None
+            conn.execute(
+                'INSERT INTO guests (event_id, name, email, status, invited_at) VALUES (?, ?, ?, ?, ?)',
+                (event_id, name, email, guest['status'], guest['invited_at']))
+            self._count_guests(conn, event_id, 1)
+        return guest
+
+    def add_guests(self, event_id, guests):
+        """Add many guests in one transaction, skipping emails already invited
+
+        Returns the list of added guest dicts, or None if the event does not exist.
+        """
+        invited_at = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            if not conn.execute('SELECT 1 FROM events WHERE id = ?', (event_id,)).fetchone():
+                return None
+            existing = {row['email'] for row in conn.execute(
+                'SELECT email FROM guests WHERE event_id = ?', (event_id,))}
+            added = []
+            for guest in guests:
+                if guest['email'] in existing:
+                    continue
+                existing.add(guest['email'])
+                added.append({'name': guest['name'], 'email': guest['email'],
+                              'invited_at': invited_at, 'status': 'Pending'})
+            conn.executemany(
+                'INSERT INTO guests (event_id, name, email, status, invited_at) VALUES (?, ?, ?, ?, ?)',
+                [(event_id, g['name'], g['email'], g['status'], g['invited_at']) for g in added])
+            self._count_guests(conn, event_id, len(added))
+        return added
+
+    def remove_guest(self, event_id, email):
+        """Remove a guest by email; return True if one was removed"""
+        conn = self._connect()
+        with conn:
+            guest = conn.execute('SELECT id, status FROM guests WHERE event_id = ? AND email = ?',
+                                 (event_id, email)).fetchone()
+            if guest is None:
+                return False
+            conn.execute('DELETE FROM guests WHERE id = ?', (guest['id'],))
+            self._count_guests(conn, event_id, -1)
+            self._count_rsvp(conn, event_id, guest['status'], None)
+        return True
+
+    def get_guest(self, event_id, email):
+        """Return one guest of an event, or None"""
+        row = self._connect().execute('SELECT * FROM guests WHERE event_id = ? AND email = ?',
+                                      (event_id, email)).fetchone()
+        return _guest_from_row(row) if row else None
+
+    def set_guest_status(self, event_id, email, status):
+        """Record a guest's RSVP; return the previous status, or None if there is no such guest
+
+        Answering the same way twice writes nothing, so retried requests are harmless.
+        """
+        conn = self._connect()
+        row = conn.execute('SELECT status FROM guests WHERE event_id = ? AND email = ?',
+                           (event_id, email)).fetchone()
+        if row is None:
+            return None
+        if row['status'] == status:
+            return status
+        # Re-read under the write lock so concurrent answers are counted once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT id, status FROM guests WHERE event_id = ? AND email = ?',
+                               (event_id, email)).fetchone()
+            if row is not None and row['status'] != status:
+                conn.execute('UPDATE guests SET status = ? WHERE id = ?', (status, row['id']))
+                self._count_rsvp(conn, event_id, row['status'], status)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return row['status'] if row else None
+
+    def rsvp_counts(self, event_id):
+        """Return {status: guests} for every RSVP status, or None if there is no such event"""
+        row = self._connect().execute(
+            'SELECT guest_count, accepted_count, declined_count FROM events WHERE id = ?',
+            (event_id,)).fetchone()
+        if row is None:
+            return None
+        return {'Pending': row['guest_count'] - row['accepted_count'] - row['declined_count'],
+                'Accepted': row['accepted_count'], 'Declined': row['declined_count']}
+
+    # Dashboard aggregates
+
+    def _count_guests(self, conn, event_id, delta):
+        if delta:
+            conn.execute('UPDATE events SET guest_count = guest_count + ? WHERE id = ?',
+                         (delta, event_id))
+            conn.execute(
+                'UPDATE user_stats SET total_guests = total_guests + ? '
+                'WHERE user_id = (SELECT user_id FROM events WHERE id = ?)', (delta, event_id))
+
+    def _count_rsvp(self, conn, event_id, old_status, new_status):
+        for status, delta in ((old_status, -1), (new_status, 1)):
+            column = RSVP_COLUMNS.get(status)
+            if column:
+                conn.execute(f'UPDATE events SET {column} = {column} + ? WHERE id = ?',
+                             (delta, event_id))
+
+    def _refresh_recent(self, conn, user_id):
+        ids = [row[0] for row in conn.execute(
+            'SELECT id FROM events WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+            (user_id, RECENT_EVENTS))]
+        conn.execute('UPDATE user_stats SET recent_event_ids = ? WHERE user_id = ?',
+                     (json.dumps(ids[::-1]), user_id))
+
+    def _rebuild_stats(self, conn):
+        conn.execute('UPDATE events SET guest_count = '
+                     '(SELECT COUNT(*) FROM guests WHERE guests.event_id = events.id)')
+        for status, column in RSVP_COLUMNS.items():
+            conn.execute(f'UPDATE events SET {column} = (SELECT COUNT(*) FROM guests '
+                         'WHERE guests.event_id = events.id AND guests.status = ?)', (status,))
+        conn.execute('DELETE FROM user_stats')
+        conn.execute(
+            'INSERT INTO user_stats (user_id, total_events, total_guests) '
+            'SELECT users.id, COUNT(events.id), COALESCE(SUM(events.guest_count), 0) '
+            'FROM users LEFT JOIN events ON events.user_id = users.id GROUP BY users.id')
+        for row in conn.execute('SELECT id FROM users').fetchall():
+            self._refresh_recent(conn, row['id'])
+
+    def dashboard_stats(self, creator):
+        """Return the maintained totals and recent events for creator's dashboard
+
+        Recent events carry a guest_count instead of their guest list.
+        """
+        conn = self._connect()
+        stats = conn.execute(
+            'SELECT user_stats.* FROM user_stats JOIN users ON users.id = user_stats.user_id '
+            'WHERE users.username = ?', (creator,)).fetchone()
+        if stats is None:
+            return {'total_events': 0, 'upcoming_events': 0, 'total_guests': 0,
+                    'recent_events': []}
+        ids = json.loads(stats['recent_event_ids'])
+        rows = {}
+        if ids:
+            placeholders = ','.join('?' * len(ids))
+            rows = {row['id']: row for row in conn.execute(
+                EVENT_QUERY + f' WHERE events.id IN ({placeholders})', ids)}
+        recent = []
+        for event_id in ids:
+            if event_id in rows:
+                event = _event_from_row(rows[event_id], [])
+                event['guest_count'] = rows[event_id]['guest_count']
+                recent.append(event)
+        # Counted from the (user_id, date) index so it stays right as days pass
+        upcoming = conn.execute(
+            'SELECT COUNT(*) FROM events WHERE user_id = ? AND date >= ?',
+            (stats['user_id'], datetime.now().strftime('%Y-%m-%d'))).fetchone()[0]
+        return {
+            'total_events': stats['total_events'],
+            'upcoming_events': upcoming,
+            'total_guests': stats['total_guests'],
+            'recent_events': recent,
+        }
+
+    def check_stats(self, repair=True):
+        """Compare the maintained aggregates with the raw tables
+
+        Returns the usernames whose aggregates were wrong; with repair=True
+        they are rebuilt from the events and guests tables.
+        """
+        conn = self._connect()
+        stale = [row['username'] for row in conn.execute(
+            'SELECT users.username FROM users '
+            'LEFT JOIN user_stats ON user_stats.user_id = users.id '
+            'WHERE user_stats.user_id IS NULL '
+            'OR user_stats.total_events != '
+            '  (SELECT COUNT(*) FROM events WHERE events.user_id = users.id) '
+            'OR user_stats.total_guests != '
+            '  (SELECT COUNT(*) FROM guests JOIN events ON events.id = guests.event_id '
+            '   WHERE events.user_id = users.id) '
+            'OR EXISTS (SELECT 1 FROM events WHERE events.user_id = users.id AND ('
+            '  events.guest_count != '
+            '  (SELECT COUNT(*) FROM guests WHERE guests.event_id = events.id) '
+            '  OR events.accepted_count != (SELECT COUNT(*) FROM guests '
+            "   WHERE guests.event_id = events.id AND guests.status = 'Accepted') "
+            '  OR events.declined_count != (SELECT COUNT(*) FROM guests '
+            "   WHERE guests.event_id = events.id AND guests.status = 'Declined'))) "
+            'OR user_stats.recent_event_ids != '
+            "  (SELECT '[' || COALESCE(group_concat(id, ', '), '') || ']' FROM "
+            '    (SELECT id FROM (SELECT id FROM events WHERE events.user_id = users.id '
+            '     ORDER BY id DESC LIMIT ?) ORDER BY id))', (RECENT_EVENTS,))]
+        if stale and repair:
+            with conn:
+                self._rebuild_stats(conn)
+        return stale
+
+    # Migration
+
+    def import_json(self, users_file, events_file):
+        """Copy users and events from the legacy JSON files into an empty database
+
+        The JSON files never enforced unique emails; a user whose username or
+        email is already taken is skipped along with their events, and
+        reported, rather than merged into the earlier user.
+        """
+        conn = self._connect()
+        if conn.execute('SELECT 1 FROM users LIMIT 1').fetchone():
+            return False
+        users = _load_json(users_file)
+        events = _load_json(events_file)
+        if not users and not events:
+            return False
+        with conn:
+            # IMMEDIATE so workers starting together cannot both import
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM users LIMIT 1').fetchone():
+                return False
+            user_ids = {}
+            skipped = set()
+            for user in users:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO users (username, email, password) VALUES (?, ?, ?)',
+                    (user['username'], user['email'], user['password']))
+                if cursor.rowcount:
+                    user_ids[user['username']] = cursor.lastrowid
+                else:
+                    skipped.add(user['username'])
+            skipped_events = 0
+            for event in events:
+                if event['creator'] in skipped:
+                    skipped_events += 1
+                    continue
+                user_id = user_ids.get(event['creator'])
+                if user_id is None:
+                    continue
+                # Keep the old id when it is free so existing links keep working
+                taken = conn.execute('SELECT 1 FROM events WHERE id = ?', (event['id'],)).fetchone()
+                cursor = conn.execute(
+                    'INSERT INTO events (id, user_id, name, date, location, description, password, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (None if taken else event['id'], user_id, event['name'], event['date'],
+                     event['location'], event.get('description', ''), event['password'],
+                     event.get('created_at')))
+                for guest in event.get('guests', []):
+                    conn.execute(
+                        'INSERT INTO guests (event_id, name, email, status, invited_at) VALUES (?, ?, ?, ?, ?)',
+                        (cursor.lastrowid, guest['name'], guest['email'],
+                         guest.get('status', 'Pending'), guest.get('invited_at')))
+            self._rebuild_stats(conn)
+        for username in sorted(skipped):
+            print(f"Import skipped user {username}: username or email already imported")
+        if skipped_events:
+            print(f"Import skipped {skipped_events} events of skipped users")
+        return True
+
+
+def _guest_from_row(row):
+    return {
+        'name': row['name'],
+        'email': row['email'],
+        'invited_at': row['invited_at'] or '',
+        'status': row['status'],
+    }
+
+
+def _event_from_row(row, guests):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'date': row['date'],
+        'location': row['location'],
+        'description': row['description'] or '',
+        'creator': row['creator'],
+        'password': row['password'],
+        'guests': guests,
+        'created_at': row['created_at'] or '',
+    }
+
+
+def encode_cursor(value, event_id):
+    """Opaque page cursor for the last event on a page"""
+    raw = json.dumps([value, event_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (value, id) pair in a cursor; raise ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, event_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(value, str) or not isinstance(event_id, int):
+        raise ValueError("Invalid cursor")
+    return value, event_id
+
+
+def _load_json(filename):
+    try:
+        return load_file(filename)
+    except ValueError:
+        return []
+
+
+def open_storage(db_file=DB_FILE, backend=None):
+    """Open the storage used by app.py and EventPlanner.py"""
+    backend = backend or STORAGE_BACKEND
+    if backend == 'json':
+        from json_storage import JSONStorage
+        return JSONStorage()
+    if backend == 'sharded':
+        from sharded_storage import ShardedJSONStorage
+        return ShardedJSONStorage()
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return SQLiteStorage(db_file)
@@ -0,0 +1,74 @@
+import importlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guest_import import import_guests  # noqa: E402
+
+CSV = b'name,email\nAda,ada@example.com\nGrace,grace@example.com\nAda again,ada@example.com\nnobody,not-an-email\n'
+
+
+class UploadStream:
+    """Binary upload with only read and iteration, like SpooledTemporaryFile before Python 3.11"""
+
+    def __init__(self, data):
+        self._file = io.BytesIO(data)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class GuestList:
+    def __init__(self):
+        self.guests = []
+
+    def add_guests(self, event_id, guests):
+        self.guests.extend(guests)
+        return guests
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # app.py opens its database and data files relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('SMTP_SERVER', raising=False)
+    monkeypatch.setenv('INVITATION_WORKERS', '0')
+    sys.modules.pop('app', None)
+    module = importlib.import_module('app')
+    yield module
+    module.invitation_queue.stop()
+    sys.modules.pop('app', None)
+
+
+def test_import_guests_without_io_protocol():
+    storage = GuestList()
+    summary = import_guests(storage, 1, UploadStream(CSV))
+    assert summary == {'added': 2, 'duplicates': 1, 'invalid': 1,
+                       'errors': ['Line 5: invalid name or email']}
+    assert [g['email'] for g in storage.guests] == ['ada@example.com', 'grace@example.com']
+
+
+def test_upload_csv_through_route(app_module):
+    storage = app_module.storage
+    storage.create_user('host', app_module.hash_password('secret'), 'host@example.com')
+    event = storage.create_event({'name': 'Launch', 'date': '2030-01-01', 'location': 'Hall',
+                                  'description': '', 'creator': 'host', 'password': 'pw'})
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': 'host', 'password': 'secret'})
+
+    response = client.post(f"/events/{event['id']}/guests/import",
+                           data={'csv_file': (io.BytesIO(CSV), 'guests.csv')},
+                           headers={'Accept': 'application/json'},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.get_json()['added'] == 2
+    guests = storage.get_event(event['id'])['guests']
+    assert sorted(g['email'] for g in guests) == ['ada@example.com', 'grace@example.com']
@@ -0,0 +1,161 @@
+import queue
+import sys
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+# How often the Tk thread checks for finished work while tasks are running
+POLL_MS = 50
+
+
+class Task:
+    """Handle for one piece of background work
+
+    The worker function receives its Task and may call report() to publish
+    progress and should check cancelled() between steps of long jobs.
+    """
+
+    def __init__(self, runner, on_done, on_error, on_progress):
+        self._runner = runner
+        self._cancelled = threading.Event()
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, done, total):
+        """Publish progress; safe to call from the worker thread"""
+        if self.on_progress is not None:
+            self._runner._messages.put((self, 'progress', (done, total)))
+
+
+class TaskRunner:
+    """Runs blocking work on worker threads and delivers results on the Tk thread
+
+    Tk is not thread-safe, so workers never touch widgets: results, errors
+    and progress are queued and handed to the callbacks from root.after.
+    The busy cursor shows while any task is outstanding.
+    """
+
+    def __init__(self, root, workers=2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tk-task')
+        self._messages = queue.Queue()
+        self._pending = 0
+        self._poll_job = None
+        # Tasks submitted and not yet finished, so shutdown can cancel them
+        self._outstanding = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None):
+        """Run fn(task, *args) on a worker and return the Task
+
+        on_done(result) or on_error(exception) is called on the Tk thread
+        when fn finishes; on_progress(done, total) for each task.report().
+        """
+        task = Task(self, on_done, on_error, on_progress)
+        with self._lock:
+            self._outstanding.add(task)
+        self._pending += 1
+        if self._pending == 1:
+            self.root.config(cursor='watch')
+        self._executor.submit(self._run, task, fn, args)
+        if self._poll_job is None:
+            self._poll_job = self.root.after(POLL_MS, self._poll)
+        return task
+
+    def _run(self, task, fn, args):
+        try:
+            self._messages.put((task, 'done', fn(task, *args)))
+        except Exception as e:
+            self._messages.put((task, 'error', e))
+        finally:
+            with self._lock:
+                self._outstanding.discard(task)
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                task, kind, value = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind != 'progress':
+                self._pending -= 1
+                if not self._pending:
+                    self.root.config(cursor='')
+            callback = {'progress': task.on_progress, 'done': task.on_done,
+                        'error': task.on_error}[kind]
+            try:
+                if callback is None:
+                    if kind == 'error':
+                        raise value
+                elif kind == 'progress':
+                    callback(*value)
+                else:
+                    callback(value)
+            except tk.TclError:
+                # The screen the callback updates was closed while it ran
+                pass
+            except Exception:
+                # Report like any Tk callback error, but keep delivering the rest
+                self.root.report_callback_exception(*sys.exc_info())
+        if self._pending:
+            self._poll_job = self.root.after(POLL_MS, self._poll)
+
+    def shutdown(self):
+        """Cancel queued work, ask running tasks to stop, and stop the workers
+
+        Worker threads are not daemons, so the process exits only once
+        running tasks notice cancelled() and return.
+        """
+        with self._lock:
+            tasks = list(self._outstanding)
+        for task in tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ProgressDialog:
+    """Modal progress bar with a Cancel button for a long-running Task"""
+
+    def __init__(self, root, title, text):
+        self.task = None
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.transient(root)
+        self.window.resizable(False, False)
+        self.window.protocol('WM_DELETE_WINDOW', self.cancel)
+
+        frame = ttk.Frame(self.window, padding="20")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text=text).pack(anchor=tk.W)
+        self.bar = ttk.Progressbar(frame, length=300, mode='determinate')
+        self.bar.pack(pady=10)
+        self.status = ttk.Label(frame, text="Starting...")
+        self.status.pack(anchor=tk.W)
+        self.cancel_button = ttk.Button(frame, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(10, 0))
+
+        self.window.grab_set()
+
+    def update(self, done, total):
+        self.bar.configure(maximum=max(total, 1), value=done)
+        self.status.configure(text=f"{done} of {total}")
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.cancel_button.configure(state=tk.DISABLED)
+        self.status.configure(text="Cancelling...")
+
+    def close(self):
+        self.window.grab_release()
+        self.window.destroy()
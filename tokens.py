@@ -0,0 +1,98 @@
+import base64
+import os
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime
+
+from storage import DB_FILE
+
+# Public address of the web app, used to build invitation links
+APP_URL = os.environ.get('APP_URL', 'http://yourapp.com')
+
+PASSWORD_CHARACTERS = string.ascii_letters + string.digits + "!@#$%^&*()"
+# 16 random bytes: 22 URL-safe characters, 128 bits of entropy
+TOKEN_BYTES = 16
+# Bound on SQLite host parameters per statement
+LOOKUP_CHUNK = 500
+
+
+def generate_password(length=12):
+    """Generate a strong random password"""
+    return ''.join(secrets.choice(PASSWORD_CHARACTERS) for _ in range(length))
+
+
+def generate_tokens(count, nbytes=TOKEN_BYTES):
+    """Return count URL-safe random tokens drawn from a single urandom call"""
+    raw = secrets.token_bytes(count * nbytes)
+    return [base64.urlsafe_b64encode(raw[i:i + nbytes]).rstrip(b'=').decode()
+            for i in range(0, len(raw), nbytes)]
+
+
+def invitation_link(event_id, token):
+    """Return the RSVP link for a guest's token"""
+    return f"{APP_URL}/events/{event_id}/join?token={token}"
+
+
+class InvitationTokenStore:
+    """Persisted invitation tokens, indexed for O(1) validation
+
+    Each guest of an event has one token; issuing again for the same guest
+    returns the existing token so links already sent keep working.
+    """
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS invitation_tokens ('
+                'token TEXT PRIMARY KEY, event_id INTEGER NOT NULL, '
+                'email TEXT NOT NULL, created_at TEXT NOT NULL, '
+                'UNIQUE (event_id, email))')
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def issue(self, event_id, emails):
+        """Return {email: token} for every email, creating tokens in one batch"""
+        emails = list(dict.fromkeys(emails))
+        created_at = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO invitation_tokens (token, event_id, email, created_at) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (event_id, email) DO NOTHING',
+                [(token, event_id, email, created_at)
+                 for token, email in zip(generate_tokens(len(emails)), emails)])
+            tokens = {}
+            for i in range(0, len(emails), LOOKUP_CHUNK):
+                chunk = emails[i:i + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                tokens.update(conn.execute(
+                    f'SELECT email, token FROM invitation_tokens '
+                    f'WHERE event_id = ? AND email IN ({placeholders})', [event_id] + chunk))
+        return tokens
+
+    def lookup(self, token):
+        """Return {'event_id', 'email'} for a token, or None"""
+        row = self._connect().execute(
+            'SELECT event_id, email FROM invitation_tokens WHERE token = ?', (token,)).fetchone()
+        return {'event_id': row[0], 'email': row[1]} if row else None
+
+    def revoke(self, event_id, email=None):
+        """Invalidate one guest's token, or every token of the event"""
+        conn = self._connect()
+        with conn:
+            if email is None:
+                conn.execute('DELETE FROM invitation_tokens WHERE event_id = ?', (event_id,))
+            else:
+                conn.execute('DELETE FROM invitation_tokens WHERE event_id = ? AND email = ?',
+                             (event_id, email))